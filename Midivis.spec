@@ -17,11 +17,11 @@ a = Analysis(
         'PySide6.QtCore',
         'PySide6.QtGui',
         'PySide6.QtWidgets',
-        'ui.main_window',
-        'ui.theme',
-        'ui.spectrum_analyzer',
-        'core.audio_manager',
-        'core.settings_manager',
+        'src.ui.main_window',
+        'src.ui.theme',
+        'src.ui.spectrum_analyzer',
+        'src.core.audio_manager',
+        'src.core.settings_manager',
     ],
     hookspath=[],
     hooksconfig={},
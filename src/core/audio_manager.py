@@ -1,7 +1,22 @@
 from typing import List, Dict, Optional
 from PySide6.QtCore import QObject, Signal
 import json
+import operator
 import os
+import re
+from collections import deque
+
+# Common audio API artifacts that vary between host APIs for the same device:
+# an optional port-type prefix and an optional API suffix, around the base name
+_BASE_NAME_RE = re.compile(
+    r'^(?:(?:microphone|line in|line out|speakers|headphones) \()?'
+    r'(.*?)'
+    r'(?: (?:wave|ks|directsound|mme)\))?$',
+    re.DOTALL
+)
+
+# Host APIs whose output devices are offered (for better compatibility)
+_OUTPUT_HOSTAPIS = frozenset(('Windows WDM-KS', 'Windows WASAPI', 'Windows DirectSound'))
 
 # Defer heavy imports until needed
 _sounddevice = None
@@ -26,6 +41,8 @@ def _get_numpy():
 
 class AudioDevice:
     """Represents an audio device with its properties"""
+    __slots__ = ('index', 'name', 'channels', 'sample_rate', 'hostapi', 'hostapi_name', 'device_type', '_sort_key')
+    
     def __init__(self, index: int, name: str, channels: int, sample_rate: float, hostapi: int, hostapi_name: str, device_type: str = "input"):
         self.index = index
         self.name = name
@@ -34,6 +51,7 @@ class AudioDevice:
         self.hostapi = hostapi
         self.hostapi_name = hostapi_name
         self.device_type = device_type  # "input" or "output"
+        self._sort_key = name.casefold()  # Case-insensitive ordering key for device lists
     
     def __repr__(self):
         return f"AudioDevice(index={self.index}, name='{self.name}', channels={self.channels}, api={self.hostapi_name})"
@@ -47,16 +65,39 @@ class AudioManager(QObject):
     streaming_started = Signal(str)    # device_name
     streaming_stopped = Signal()
     error_occurred = Signal(str)       # error_message
-    audio_data_ready = Signal(object)  # numpy array of audio data for spectrum analysis
+    audio_data_available = Signal()    # New input in the ring buffer, fetch it with read_audio_data
     
     def __init__(self, lazy_init=False):
         super().__init__()
         self.stream = None
         self.is_muted = False
+        self.blocksize = 256      # Frames per callback, small for low latency
+        self.latency = 'low'      # Requested PortAudio latency ('low' or 'high')
+        self.sample_format = 'float32'  # Stream dtype, 'int16' halves bandwidth on int16 hardware
+        self._rt_promoted = False  # Whether the current audio thread got real-time priority
+        self._rt_promote_error = None  # Why priority elevation failed, reported on the GUI thread
+        self._silence = None       # Pre-allocated silence block, sized when a stream opens
+        self._fade_out = None      # Pre-allocated gain ramps (column vectors) for mute flips,
+        self._fade_in = None       # sized to the stream's blocksize when a stream opens
+        self._output_muted = False  # Mute state last applied to the output by the callback
+        self._status_queue = deque(maxlen=64)  # Stream status flags, drained on the GUI thread
+        
+        # Single-producer/single-consumer ring of recent input samples. Only the audio
+        # thread advances _ring_write and only the consumer advances _ring_read.
+        self.ring_frames = 16384
+        self._ring = None
+        self._ring_size = 0   # Frames in _ring, fixed when the stream opens
+        self._ring_write = 0  # Total frames written by the audio callback
+        self._ring_read = 0   # Total frames consumed by read_audio_data
+        self._audio_pending = False  # Set by the callback when notified, cleared by read_audio_data
         self.current_input_device: Optional[AudioDevice] = None
         self.current_output_device: Optional[AudioDevice] = None
         self.available_input_devices: List[AudioDevice] = []
         self.available_output_devices: List[AudioDevice] = []
+        self._input_devices_by_name: Dict[str, AudioDevice] = {}
+        self._output_devices_by_name: Dict[str, AudioDevice] = {}
+        
+        self._devices_signature = None  # Signature of the device table last built from
         
         # Only refresh devices if not lazy initialization
         if not lazy_init:
@@ -64,144 +105,124 @@ class AudioManager(QObject):
     
     def refresh_devices(self) -> tuple[List[AudioDevice], List[AudioDevice]]:
         """Refresh and return lists of available input and output devices"""
-        self.available_input_devices.clear()
-        self.available_output_devices.clear()
-        
         try:
             sd = _get_sounddevice()
+        except (ImportError, OSError) as e:  # sounddevice or the PortAudio library is missing
+            self.error_occurred.emit(f"Failed to query devices: {str(e)}")
+            return self.available_input_devices, self.available_output_devices
+        
+        try:
             devices = sd.query_devices()
+            hostapis = list(sd.query_hostapis())  # All host APIs in one query
+        except sd.PortAudioError as e:
+            self.error_occurred.emit(f"Failed to query devices: {str(e)}")
+            return self.available_input_devices, self.available_output_devices
+        
+        # Only rebuild the device lists if the device table actually changed
+        signature = tuple(
+            (d['name'], d['hostapi'], d['max_input_channels'], d['max_output_channels'])
+            for d in devices
+        )
+        if signature == self._devices_signature:
+            return self.available_input_devices, self.available_output_devices
+        
+        self.available_input_devices.clear()
+        self.available_output_devices.clear()
+        
+        # Keep only the best version of each device name (non-truncated), as a
+        # (preference key, device) pair per base name
+        input_device_groups: Dict[str, tuple] = {}
+        output_device_groups: Dict[str, tuple] = {}
+        
+        for i, device in enumerate(devices):
+            max_input_channels = device['max_input_channels']
+            max_output_channels = device['max_output_channels']
+            hostapi_index = device.get('hostapi', 0)
+            hostapi_name = hostapis[hostapi_index]['name'] if hostapi_index < len(hostapis) else 'Unknown'
+            is_input = max_input_channels > 0
+            is_output = max_output_channels > 0 and hostapi_name in _OUTPUT_HOSTAPIS
+            if not (is_input or is_output):
+                continue  # Filtered out, skip the name handling entirely
             
-            # Get host API information
-            hostapis = []
-            try:
-                for i in range(len(devices)):
-                    hostapi_index = devices[i].get('hostapi', 0)
-                    if hostapi_index >= len(hostapis):
-                        while len(hostapis) <= hostapi_index:
-                            try:
-                                hostapi_info = sd.query_hostapis(len(hostapis))
-                                hostapis.append(hostapi_info)
-                            except:
-                                hostapis.append({'name': 'Unknown'})
-            except:
-                pass
-            
-            # Group devices by name to find the best version (non-truncated)
-            input_device_groups = {}
-            output_device_groups = {}
-            
-            for i, device in enumerate(devices):
-                device_name = device.get('name', '').strip()
-                hostapi_index = device.get('hostapi', 0)
-                hostapi_name = hostapis[hostapi_index]['name'] if hostapi_index < len(hostapis) else 'Unknown'
-                
-                # Create device info
-                device_info = {
-                    'index': i,
-                    'name': device_name,
-                    'hostapi': hostapi_index,
-                    'hostapi_name': hostapi_name,
-                    'sample_rate': device.get('default_samplerate', 44100),
-                    'name_length': len(device_name)
-                }
-                
-                # Process input devices
-                if device['max_input_channels'] > 0:
-                    channels = device['max_input_channels']
-                    device_info['channels'] = channels
-                    
-                    # Group by base name (for deduplication)
-                    base_name = self._get_base_device_name(device_name)
-                    
-                    if base_name not in input_device_groups:
-                        input_device_groups[base_name] = []
-                    input_device_groups[base_name].append(device_info)
-                
-                # Process output devices (WDM-KS, WASAPI, and DirectSound for better compatibility)
-                if device['max_output_channels'] > 0 and hostapi_name in ['Windows WDM-KS', 'Windows WASAPI', 'Windows DirectSound']:
-                    channels = device['max_output_channels']
-                    device_info['channels'] = channels
-                    
-                    # Group by base name (for deduplication)
-                    base_name = self._get_base_device_name(device_name)
-                    
-                    if base_name not in output_device_groups:
-                        output_device_groups[base_name] = []
-                    output_device_groups[base_name].append(device_info)
-            
-            # Select best device from each group (longest name = least truncated)
-            for base_name, device_list in input_device_groups.items():
-                best_device = max(device_list, key=lambda d: (d['name_length'], d['hostapi'] != 0))  # Prefer longer names and non-MME
-                
-                audio_device = AudioDevice(
-                    index=best_device['index'],
-                    name=best_device['name'],
-                    channels=best_device['channels'],
-                    sample_rate=best_device['sample_rate'],
-                    hostapi=best_device['hostapi'],
-                    hostapi_name=best_device['hostapi_name'],
-                    device_type="input"
-                )
-                self.available_input_devices.append(audio_device)
+            device_name = device.get('name', '').strip()
+            sample_rate = device.get('default_samplerate', 44100)
             
-            for base_name, device_list in output_device_groups.items():
-                best_device = max(device_list, key=lambda d: d['name_length'])  # WDM-KS names should be full
-                
-                audio_device = AudioDevice(
-                    index=best_device['index'],
-                    name=best_device['name'],
-                    channels=best_device['channels'],
-                    sample_rate=best_device['sample_rate'],
-                    hostapi=best_device['hostapi'],
-                    hostapi_name=best_device['hostapi_name'],
-                    device_type="output"
-                )
-                self.available_output_devices.append(audio_device)
+            # Group by base name (for deduplication), computed once for duplex devices
+            base_name = self._get_base_device_name(device_name)
             
-            # Sort devices by name for consistent ordering
-            self.available_input_devices.sort(key=lambda d: d.name.lower())
-            self.available_output_devices.sort(key=lambda d: d.name.lower())
+            # Process input devices
+            if is_input:
+                # Prefer longer names and non-MME
+                key = (len(device_name), hostapi_index != 0)
+                best = input_device_groups.get(base_name)
+                if best is None or key > best[0]:
+                    input_device_groups[base_name] = (key, AudioDevice(
+                        index=i,
+                        name=device_name,
+                        channels=max_input_channels,
+                        sample_rate=sample_rate,
+                        hostapi=hostapi_index,
+                        hostapi_name=hostapi_name,
+                        device_type="input"
+                    ))
             
-        except Exception as e:
-            self.error_occurred.emit(f"Failed to query devices: {str(e)}")
+            # Process output devices (WDM-KS, WASAPI, and DirectSound for better compatibility)
+            if is_output:
+                # WDM-KS names should be full
+                key = len(device_name)
+                best = output_device_groups.get(base_name)
+                if best is None or key > best[0]:
+                    output_device_groups[base_name] = (key, AudioDevice(
+                        index=i,
+                        name=device_name,
+                        channels=max_output_channels,
+                        sample_rate=sample_rate,
+                        hostapi=hostapi_index,
+                        hostapi_name=hostapi_name,
+                        device_type="output"
+                    ))
+        
+        self.available_input_devices.extend(device for _, device in input_device_groups.values())
+        self.available_output_devices.extend(device for _, device in output_device_groups.values())
+        
+        # Sort devices by name for consistent ordering
+        by_name = operator.attrgetter('_sort_key')
+        self.available_input_devices.sort(key=by_name)
+        self.available_output_devices.sort(key=by_name)
+        
+        # Index by name for lookups, first device in sorted order wins on duplicates
+        self._input_devices_by_name.clear()
+        self._output_devices_by_name.clear()
+        for device in self.available_input_devices:
+            self._input_devices_by_name.setdefault(device.name, device)
+        for device in self.available_output_devices:
+            self._output_devices_by_name.setdefault(device.name, device)
+        
+        self._devices_signature = signature
         
         return self.available_input_devices, self.available_output_devices
     
     def _get_base_device_name(self, name: str) -> str:
         """Extract base device name for grouping similar devices"""
         # Remove common prefixes and suffixes that might vary between APIs
-        base = name.lower().strip()
-        
-        # Remove common audio API artifacts
-        prefixes_to_remove = ['microphone (', 'line in (', 'line out (', 'speakers (', 'headphones (']
-        suffixes_to_remove = [' wave)', ' ks)', ' directsound)', ' mme)']
-        
-        for prefix in prefixes_to_remove:
-            if base.startswith(prefix):
-                base = base[len(prefix):]
-                break
-        
-        for suffix in suffixes_to_remove:
-            if base.endswith(suffix):
-                base = base[:-len(suffix)]
-                break
+        base = _BASE_NAME_RE.match(name.lower().strip()).group(1)
         
         # Handle truncated names by using first part as base
         if len(name) == 31:  # MME truncation length
             # For truncated names, use everything before the last word as base
-            parts = base.split()
+            parts = base.rsplit(None, 1)
             if len(parts) > 1:
-                base = ' '.join(parts[:-1])
+                base = parts[0]
         
         return base
     
     def get_input_device_by_name(self, name: str) -> Optional[AudioDevice]:
         """Find input device by name"""
-        return next((device for device in self.available_input_devices if device.name == name), None)
+        return self._input_devices_by_name.get(name)
     
     def get_output_device_by_name(self, name: str) -> Optional[AudioDevice]:
         """Find output device by name"""
-        return next((device for device in self.available_output_devices if device.name == name), None)
+        return self._output_devices_by_name.get(name)
     
     def get_device_by_name(self, name: str) -> Optional[AudioDevice]:
         """Find device by name (backward compatibility - searches input devices)"""
@@ -209,21 +230,125 @@ class AudioManager(QObject):
     
     def audio_callback(self, indata, outdata, frames, time, status):
         """Audio stream callback function"""
-        # Emit audio data for spectrum analysis (always emit, even when muted)
-        self.audio_data_ready.emit(indata.copy())
+        if not self._rt_promoted:
+            self._promote_audio_thread()
         
-        if self.is_muted:
-            outdata[:] = 0  # Output silence when muted
+        # Never do I/O on the audio thread, just hand the flags to the GUI thread
+        if status:
+            self._status_queue.append(status)
+        
+        # Fill the output buffer first so signal dispatch never delays playback.
+        # Hot names are read once into locals, numpy is already loaded by _open_stream.
+        np = _numpy
+        muted = self.is_muted
+        if muted is not self._output_muted:
+            # Mute state flipped, ramp the gain across this block to avoid a click
+            self._output_muted = muted
+            ramp = self._fade_out if muted else self._fade_in
+            np.multiply(indata, ramp[:frames], out=outdata, casting='unsafe')
+        elif muted:
+            np.copyto(outdata, self._silence[:frames], casting='no')  # Output silence when muted
+        else:
+            np.copyto(outdata, indata, casting='no')  # Pass input to output
+
+        # Publish the block to the ring buffer for non-realtime consumers
+        ring = self._ring
+        size = self._ring_size
+        start = self._ring_write % size
+        end = start + frames
+        if end <= size:
+            ring[start:end] = indata
         else:
-            outdata[:] = indata  # Pass input to output
+            split = size - start
+            ring[start:] = indata[:split]
+            ring[:end - size] = indata[split:]
+        self._ring_write += frames
+        
+        # Notify consumers of new audio (always, even when muted). Notifications coalesce:
+        # only one is in flight until the consumer reads, which then gets everything up to
+        # one ring's worth of the newest samples, so a stalled consumer never backlogs.
+        if not self._audio_pending:
+            self._audio_pending = True
+            self.audio_data_available.emit()
+    
+    def _promote_audio_thread(self):
+        """Raise the calling audio thread to real-time priority (once per stream)"""
+        self._rt_promoted = True
+        try:
+            if os.name == 'nt':
+                import ctypes
+                task_index = ctypes.c_ulong(0)
+                handle = ctypes.windll.avrt.AvSetMmThreadCharacteristicsW("Pro Audio", ctypes.byref(task_index))
+                if not handle:
+                    raise ctypes.WinError()
+            elif hasattr(os, 'sched_setscheduler'):
+                # On Linux pid 0 refers to the calling thread
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(80))
+        except Exception as e:
+            # Common without CAP_SYS_NICE; no I/O here, the GUI thread reports it
+            self._rt_promote_error = e
+    
+    def _open_stream(self, device, sample_rate, channels):
+        """Open and start a stream, requesting low latency before falling back to high"""
+        sd = _get_sounddevice()
+        np = _get_numpy()
+        
+        # Pre-zeroed block copied out while muted, sized for the requested blocksize
+        self._silence = np.zeros((max(self.blocksize, 1024), channels), dtype=self.sample_format)
+        
+        # Mute fade ramps span exactly one callback block, the stream's blocksize is fixed
+        self._fade_out = np.linspace(1.0, 0.0, self.blocksize, dtype=np.float32)[:, None]
+        self._fade_in = np.linspace(0.0, 1.0, self.blocksize, dtype=np.float32)[:, None]
+        
+        # Fresh ring buffer for this stream's channel layout
+        self._ring = np.zeros((self.ring_frames, channels), dtype=self.sample_format)
+        self._ring_size = self.ring_frames
+        self._ring_write = 0
+        self._ring_read = 0
+        self._audio_pending = False
+        
+        try:
+            stream = sd.Stream(
+                device=device,
+                samplerate=sample_rate,
+                blocksize=self.blocksize,
+                latency=self.latency,
+                channels=channels,
+                dtype=self.sample_format,
+                callback=self.audio_callback
+            )
+        except sd.PortAudioError:
+            if self.latency == 'high':
+                raise
+            # Some devices reject low latency, retry with the safe host default. The
+            # blocksize stays fixed so every callback delivers exactly self.blocksize
+            # frames, which the ring's torn-read headroom relies on.
+            stream = sd.Stream(
+                device=device,
+                samplerate=sample_rate,
+                blocksize=self.blocksize,
+                latency='high',
+                channels=channels,
+                dtype=self.sample_format,
+                callback=self.audio_callback
+            )
+        
+        stream.start()
+        return stream
     
     def start_streaming(self, input_device: AudioDevice, output_device: Optional[AudioDevice] = None) -> bool:
         """Start audio streaming with the specified input and output devices"""
+        # Reopening a stream is slow on some host APIs, keep a live stream that already
+        # uses exactly these devices (e.g. after a device refresh rebuilt the device objects)
+        if (self.stream is not None and self.stream.active
+                and self._same_device(self.current_input_device, input_device)
+                and self._same_device(self.current_output_device, output_device)):
+            return True
+        
         try:
             self.stop_streaming()
-            
-            sd = _get_sounddevice()
-            np = _get_numpy()
+            self._rt_promoted = False  # New stream, new audio thread
+            self._output_muted = self.is_muted  # Start in the current state without a fade
             
             input_channels = min(input_device.channels, 2)  # Use stereo if available, otherwise mono
             
@@ -250,28 +375,18 @@ class AudioManager(QObject):
             
             # Try to create the stream with error handling for device compatibility
             try:
-                self.stream = sd.Stream(
-                    device=(input_device.index, output_device_index),
-                    samplerate=sample_rate,
-                    channels=channels,
-                    dtype=np.float32,
-                    callback=self.audio_callback
+                self.stream = self._open_stream(
+                    (input_device.index, output_device_index), sample_rate, channels
                 )
                 
-                self.stream.start()
-                
             except Exception as stream_error:
                 # If WDM-KS fails, try falling back to default output
                 if output_device and output_device.hostapi_name == 'Windows WDM-KS':
-                    self.stream = sd.Stream(
-                        device=(input_device.index, None),  # Use default output
-                        samplerate=input_device.sample_rate,
-                        channels=input_channels,
-                        dtype=np.float32,
-                        callback=self.audio_callback
+                    self.stream = self._open_stream(
+                        (input_device.index, None),  # Use default output
+                        input_device.sample_rate,
+                        input_channels
                     )
-                    
-                    self.stream.start()
                     output_device = None  # Mark as using default output
                 else:
                     raise stream_error
@@ -295,6 +410,12 @@ class AudioManager(QObject):
             self.status_changed.emit(error_msg, "#ff4444")
             return False
     
+    def _same_device(self, current: Optional[AudioDevice], requested: Optional[AudioDevice]) -> bool:
+        """Whether two device entries refer to the same PortAudio device"""
+        if current is None or requested is None:
+            return current is requested
+        return current.index == requested.index and current.name == requested.name
+    
     def stop_streaming(self):
         """Stop current audio streaming"""
         if self.stream:
@@ -310,6 +431,48 @@ class AudioManager(QObject):
             except Exception as e:
                 print(f"Error stopping stream: {e}")
     
+    def read_audio_data(self):
+        """Return input samples written since the last call (at most one ring's worth), or None"""
+        ring = self._ring
+        if ring is None:
+            return None
+        
+        self._audio_pending = False  # Re-arm before reading so later blocks notify again
+        write = self._ring_write
+        size = self._ring_size
+        blocksize = self.blocksize
+        # Leave one block of headroom, the callback may be writing the next block right now
+        available = min(write - self._ring_read, size - blocksize)
+        self._ring_read = write
+        if available <= 0:
+            return None
+        
+        start = (write - available) % size
+        end = start + available
+        if end <= size:
+            data = ring[start:end].copy()
+        else:
+            data = _numpy.concatenate((ring[start:], ring[:end - size]))  # Loaded by _open_stream with the ring
+        
+        # Blocks written during the copy may have overwritten its oldest frames, drop those
+        torn = self._ring_write + blocksize - size - (write - available)
+        if torn >= available:
+            return None
+        return data[torn:] if torn > 0 else data
+    
+    def take_priority_error(self) -> Optional[Exception]:
+        """Return and clear the audio thread priority elevation error, if any"""
+        error = self._rt_promote_error
+        self._rt_promote_error = None
+        return error
+    
+    def drain_stream_status(self) -> list:
+        """Return and clear stream status flags reported by the audio callback"""
+        statuses = []
+        while self._status_queue:
+            statuses.append(self._status_queue.popleft())
+        return statuses
+    
     def toggle_mute(self) -> bool:
         """Toggle mute state and return new state"""
         self.is_muted = not self.is_muted
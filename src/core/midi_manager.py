@@ -1,5 +1,9 @@
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable
 from PySide6.QtCore import QObject, Signal, QTimer, QMetaObject, Qt
+from collections import deque
+import heapq
+import itertools
+import math
 import time
 
 # Defer heavy imports until needed
@@ -19,6 +23,8 @@ def _get_rtmidi():
 
 class MIDIDevice:
     """Represents a MIDI input device"""
+    __slots__ = ('index', 'name')
+    
     def __init__(self, index: int, name: str):
         self.index = index
         self.name = name
@@ -33,19 +39,45 @@ class MIDIManager(QObject):
     # Signals for UI updates
     note_on = Signal(int, int)   # note_number, velocity
     note_off = Signal(int)       # note_number
+    notes_batch = Signal(list)   # [(note_number, velocity), ...] in arrival order, velocity 0 = note off
     error_occurred = Signal(str) # error_message
     
     # Internal signals for delayed processing (connect to main thread)
     _delayed_note_on_signal = Signal(int, int, int)   # note, velocity, delay_ms
     _delayed_note_off_signal = Signal(int, int)       # note, delay_ms
+    _notes_available = Signal()                       # Batched notes waiting to be flushed
     
     def __init__(self):
         super().__init__()
         self.midi_in = None
         self.current_device: Optional[MIDIDevice] = None
         self.available_devices: List[MIDIDevice] = []
+        self._devices_by_name: Dict[str, MIDIDevice] = {}
+        self._probe_midi_in = None  # Reused MidiIn that only enumerates ports, never opens one
+        
         self.delay_ms = 0  # MIDI delay compensation in milliseconds
         
+        # Optional direct listeners that get every note event without a Qt event per receiver:
+        # called on the MIDI input thread for immediate events and on the GUI thread for
+        # delayed ones, so they must be thread-safe and return quickly
+        self.note_on_callback: Optional[Callable[[int, int], None]] = None
+        self.note_off_callback: Optional[Callable[[int], None]] = None
+        
+        # Notes collected for notes_batch until the GUI thread flushes them; events that
+        # arrive together (e.g. a chord) go out as one batch
+        self._pending_notes = deque()
+        self._notes_flush_pending = False
+        self._notes_available.connect(self._flush_notes, Qt.ConnectionType.QueuedConnection)
+        
+        # Delayed note events as a heap of (deadline, sequence, note, velocity or None for
+        # note off), all served by one timer armed for the earliest deadline
+        self._delayed_events = []
+        self._delayed_sequence = itertools.count()
+        self._delay_timer = QTimer(self)
+        self._delay_timer.setSingleShot(True)
+        self._delay_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._delay_timer.timeout.connect(self._emit_due_events)
+        
         # Connect internal signals to delayed handlers
         self._delayed_note_on_signal.connect(self._handle_delayed_note_on)
         self._delayed_note_off_signal.connect(self._handle_delayed_note_off)
@@ -53,36 +85,50 @@ class MIDIManager(QObject):
     def refresh_devices(self) -> List[MIDIDevice]:
         """Refresh and return list of available MIDI input devices"""
         self.available_devices.clear()
+        self._devices_by_name.clear()
         
         try:
-            rtmidi = _get_rtmidi()
-            midi_in = rtmidi.MidiIn()
-            
             # Get available ports
-            ports = midi_in.get_ports()
+            ports = self._get_probe().get_ports()
             
             for i, port_name in enumerate(ports):
                 device = MIDIDevice(index=i, name=port_name.strip())
                 self.available_devices.append(device)
-            
-            midi_in.close_port()
-            del midi_in
+                self._devices_by_name.setdefault(device.name, device)
             
         except Exception as e:
             self.error_occurred.emit(f"Failed to query MIDI devices: {str(e)}")
         
         return self.available_devices
     
+    def _get_probe(self):
+        """Return the shared port-enumeration MidiIn, creating it on first use"""
+        if self._probe_midi_in is None:
+            rtmidi = _get_rtmidi()
+            self._probe_midi_in = rtmidi.MidiIn()
+        return self._probe_midi_in
+    
     def set_delay(self, delay_ms: int):
         """Set MIDI delay compensation in milliseconds"""
+        was_delayed = self.delay_ms > 0
         self.delay_ms = max(0, delay_ms)  # Ensure non-negative delay
+        
+        # Switch the input callback when delay compensation turns on or off
+        if self.midi_in and was_delayed != (self.delay_ms > 0):
+            self.midi_in.set_callback(self._select_midi_callback())
     
     def get_device_by_name(self, name: str) -> Optional[MIDIDevice]:
         """Find MIDI device by name"""
-        return next((device for device in self.available_devices if device.name == name), None)
+        return self._devices_by_name.get(name)
     
     def start_listening(self, device: MIDIDevice) -> bool:
         """Start listening to MIDI input from the specified device"""
+        # A device refresh re-selects the same port, keep the open connection then
+        current = self.current_device
+        if (self.midi_in is not None and current is not None and self.midi_in.is_port_open()
+                and current.index == device.index and current.name == device.name):
+            return True
+        
         try:
             self.stop_listening()
             
@@ -97,7 +143,7 @@ class MIDIManager(QObject):
                 return False
             
             # Set callback for MIDI messages
-            self.midi_in.set_callback(self._midi_callback)
+            self.midi_in.set_callback(self._select_midi_callback())
             
             # Open the specified port
             self.midi_in.open_port(device.index)
@@ -121,47 +167,117 @@ class MIDIManager(QObject):
                 print(f"Error stopping MIDI listening: {e}")
     
     def _midi_callback(self, event, data=None):
-        """Handle incoming MIDI messages"""
+        """Handle incoming MIDI messages (no delay compensation)"""
         message, deltatime = event
         
-        if len(message) >= 2:
-            status = message[0]
-            
-            # Note On (0x90-0x9F)
-            if status >= 0x90 and status <= 0x9F:
-                note = message[1]
-                velocity = message[2] if len(message) > 2 else 64
-                
-                if velocity > 0:
-                    if self.delay_ms > 0:
-                        # Schedule delayed emission using internal signal
-                        self._delayed_note_on_signal.emit(note, velocity, self.delay_ms)
-                    else:
-                        # Emit immediately (signals are thread-safe in Qt)
-                        self.note_on.emit(note, velocity)
-                else:
-                    # Note on with velocity 0 is equivalent to note off
-                    if self.delay_ms > 0:
-                        self._delayed_note_off_signal.emit(note, self.delay_ms)
-                    else:
-                        self.note_off.emit(note)
-            
-            # Note Off (0x80-0x8F)
-            elif status >= 0x80 and status <= 0x8F:
-                note = message[1]
-                if self.delay_ms > 0:
-                    self._delayed_note_off_signal.emit(note, self.delay_ms)
-                else:
-                    self.note_off.emit(note)
+        if len(message) == 3:
+            status, note, velocity = message  # Common case, a complete channel message
+        elif len(message) == 2:
+            status, note = message
+            velocity = 64
+        else:
+            return
+        
+        # Dispatch on the message type (high nibble), the low nibble is the channel
+        kind = status & 0xF0
+        
+        # Note On, with velocity 0 being equivalent to note off.
+        # Emit immediately (signals are thread-safe in Qt)
+        if kind == 0x90 and velocity > 0:
+            self._dispatch_note_on(note, velocity)
+        
+        # Note Off
+        elif kind == 0x80 or kind == 0x90:
+            self._dispatch_note_off(note)
+    
+    def _midi_callback_delayed(self, event, data=None):
+        """Handle incoming MIDI messages, scheduling them after the delay compensation"""
+        message, deltatime = event
+        
+        if len(message) == 3:
+            status, note, velocity = message
+        elif len(message) == 2:
+            status, note = message
+            velocity = 64
+        else:
+            return
+        
+        kind = status & 0xF0
+        
+        # Schedule delayed emission using internal signals
+        if kind == 0x90 and velocity > 0:
+            self._delayed_note_on_signal.emit(note, velocity, self.delay_ms)
+        elif kind == 0x80 or kind == 0x90:
+            self._delayed_note_off_signal.emit(note, self.delay_ms)
+    
+    def _select_midi_callback(self):
+        """Return the MIDI callback specialized for the current delay setting"""
+        return self._midi_callback_delayed if self.delay_ms > 0 else self._midi_callback
+    
+    def _dispatch_note_on(self, note: int, velocity: int):
+        """Deliver a note on event to the signals and the direct listener"""
+        self.note_on.emit(note, velocity)
+        callback = self.note_on_callback
+        if callback is not None:
+            callback(note, velocity)
+        self._batch_note(note, velocity)
+    
+    def _dispatch_note_off(self, note: int):
+        """Deliver a note off event to the signals and the direct listener"""
+        self.note_off.emit(note)
+        callback = self.note_off_callback
+        if callback is not None:
+            callback(note)
+        self._batch_note(note, 0)
+    
+    def _batch_note(self, note: int, velocity: int):
+        """Collect a note for notes_batch, requesting a flush only for the first pending one"""
+        self._pending_notes.append((note, velocity))
+        if not self._notes_flush_pending:
+            self._notes_flush_pending = True
+            self._notes_available.emit()
+    
+    def _flush_notes(self):
+        """Emit all collected notes as one batch (GUI thread)"""
+        self._notes_flush_pending = False  # Re-arm first so notes arriving from now on flush again
+        pending = self._pending_notes
+        notes = []
+        while pending:
+            notes.append(pending.popleft())
+        if notes:
+            self.notes_batch.emit(notes)
     
     # Helper methods for thread-safe MIDI event handling
     def _handle_delayed_note_on(self, note: int, velocity: int, delay_ms: int):
-        """Handle delayed note_on signal using QTimer"""
-        QTimer.singleShot(delay_ms, lambda: self.note_on.emit(note, velocity))
+        """Handle delayed note_on signal using the shared delay timer"""
+        self._schedule_note_event(delay_ms, note, velocity)
     
     def _handle_delayed_note_off(self, note: int, delay_ms: int):
-        """Handle delayed note_off signal using QTimer"""
-        QTimer.singleShot(delay_ms, lambda: self.note_off.emit(note))
+        """Handle delayed note_off signal using the shared delay timer"""
+        self._schedule_note_event(delay_ms, note, None)
+    
+    def _schedule_note_event(self, delay_ms: int, note: int, velocity: Optional[int]):
+        """Queue a note event (velocity None for note off) to be emitted after delay_ms"""
+        deadline = time.monotonic() + delay_ms / 1000.0
+        heapq.heappush(self._delayed_events, (deadline, next(self._delayed_sequence), note, velocity))
+        
+        # Re-arm the timer if this event is now the earliest one
+        if self._delayed_events[0][0] == deadline:
+            self._delay_timer.start(delay_ms)
+    
+    def _emit_due_events(self):
+        """Emit all delayed note events whose deadline has passed"""
+        events = self._delayed_events
+        now = time.monotonic()
+        while events and events[0][0] <= now:
+            _, _, note, velocity = heapq.heappop(events)
+            if velocity is None:
+                self._dispatch_note_off(note)
+            else:
+                self._dispatch_note_on(note, velocity)
+        
+        if events:
+            self._delay_timer.start(math.ceil((events[0][0] - now) * 1000))
     
     def is_listening(self) -> bool:
         """Check if currently listening to MIDI"""
@@ -174,17 +290,14 @@ class MIDIManager(QObject):
     def test_device(self, device: MIDIDevice) -> bool:
         """Test if a MIDI device can be opened without starting listening"""
         try:
-            rtmidi = _get_rtmidi()
-            test_midi_in = rtmidi.MidiIn()
-            
             # Check if the device index is valid
-            available_ports = test_midi_in.get_ports()
+            available_ports = self._get_probe().get_ports()
             if device.index >= len(available_ports):
-                test_midi_in.close_port()
-                del test_midi_in
                 return False
             
-            # Try to open and immediately close
+            # Try to open and immediately close, with a short-lived instance
+            rtmidi = _get_rtmidi()
+            test_midi_in = rtmidi.MidiIn()
             test_midi_in.open_port(device.index)
             test_midi_in.close_port()
             del test_midi_in
@@ -226,21 +339,9 @@ class MIDIManager(QObject):
             (74, 85, 1000, 500),  # D5
         ]
         
-        self._play_demo_sequence(demo_sequence, 0)
-    
-    def _play_demo_sequence(self, sequence, index):
-        """Recursively play demo sequence notes"""
-        if index >= len(sequence):
-            return  # Demo finished
-        
-        note, velocity, duration_ms, pause_after_ms = sequence[index]
-        
-        # Play note on
-        self.note_on.emit(note, velocity)
-        
-        # Schedule note off
-        QTimer.singleShot(duration_ms, lambda: self.note_off.emit(note))
-        
-        # Schedule next note
-        next_delay = duration_ms + pause_after_ms
-        QTimer.singleShot(next_delay, lambda: self._play_demo_sequence(sequence, index + 1))
+        # Lay the sequence out on one timeline, the delay timer then plays it back
+        start_ms = 0
+        for note, velocity, duration_ms, pause_after_ms in demo_sequence:
+            self._schedule_note_event(start_ms, note, velocity)
+            self._schedule_note_event(start_ms + duration_ms, note, None)
+            start_ms += duration_ms + pause_after_ms
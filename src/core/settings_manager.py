@@ -1,19 +1,50 @@
+import binascii
 import json
 import os
 import sys
 from typing import Optional
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, QTimer, QByteArray
+
+# orjson encodes in one C call straight to bytes, the stdlib json module is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encode_settings(settings: dict) -> bytes:
+    """Serialize settings to indented JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(settings, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(settings, indent=2).encode('utf-8')
+
+
+def _decode_settings(data: bytes) -> dict:
+    """Parse JSON settings bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class SettingsManager(QObject):
     """Manages application settings persistence"""
     
     settings_changed = Signal()  # Emitted when settings are saved
+    setting_changed = Signal(str)  # Emitted with the key when a setting is set
     
     def __init__(self, settings_file: str = "settings.json"):
         super().__init__()
         self.settings_file = self._get_settings_path(settings_file)
         self._settings = {}
+        self._last_saved_json = None  # Serialized settings (bytes) as last written to / read from disk
+        
+        # Coalesces bursts of setting changes into a single write, save_settings() flushes
+        # immediately
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(250)
+        self._save_timer.timeout.connect(self.save_settings)
+        
         self.load_settings()
     
     def _get_settings_path(self, filename: str) -> str:
@@ -44,22 +75,45 @@ class SettingsManager(QObject):
         return self._settings.get(key, default)
     
     def set_setting(self, key: str, value):
-        """Set a setting value"""
+        """Set a setting value, saved to file by the debounced save"""
+        # Re-setting a plain value unchanged needs no save at all. Containers may have been
+        # mutated in place since the last save, so they always go through the payload check.
+        if isinstance(value, (str, int, float, bool)) and key in self._settings and self._settings[key] == value:
+            return
         self._settings[key] = value
+        self.setting_changed.emit(key)
+        self.schedule_save()
+    
+    def schedule_save(self):
+        """Save settings to file once no further changes arrive for 250ms"""
+        self._save_timer.start()
     
     def save_settings(self) -> bool:
         """Save current settings to file"""
+        self._save_timer.stop()  # A direct save supersedes any pending scheduled one
         try:
             # Convert QByteArray to base64 string for JSON serialization
             settings_to_save = {}
             for key, value in self._settings.items():
-                if hasattr(value, 'toBase64'):  # QByteArray
-                    settings_to_save[key] = value.toBase64().data().decode('utf-8')
+                if isinstance(value, QByteArray):
+                    # Encode the raw bytes in one C call instead of a Qt round-trip
+                    settings_to_save[key] = binascii.b2a_base64(value.data(), newline=False).decode('ascii')
                 else:
                     settings_to_save[key] = value
             
-            with open(self.settings_file, 'w') as f:
-                json.dump(settings_to_save, f, indent=2)
+            settings_json = _encode_settings(settings_to_save)
+            if settings_json == self._last_saved_json:
+                return True  # Nothing changed since the last write
+            
+            # Write to a temporary file and swap it in so a crash never leaves a truncated file
+            temp_file = self.settings_file + '.tmp'
+            with open(temp_file, 'wb') as f:
+                f.write(settings_json)
+                f.flush()
+                os.fsync(f.fileno())  # Data must be on disk before the rename makes it visible
+            os.replace(temp_file, self.settings_file)
+            
+            self._last_saved_json = settings_json
             self.settings_changed.emit()
             return True
         except Exception as e:
@@ -70,19 +124,19 @@ class SettingsManager(QObject):
         """Load settings from file"""
         try:
             if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r') as f:
-                    loaded_settings = json.load(f)
+                with open(self.settings_file, 'rb') as f:
+                    settings_json = f.read()
+                loaded_settings = _decode_settings(settings_json)
+                self._last_saved_json = settings_json
                 
-                # Convert base64 strings back to QByteArray for geometry
-                from PySide6.QtCore import QByteArray
-                for key, value in loaded_settings.items():
-                    if key == "window_geometry" and isinstance(value, str):
-                        try:
-                            self._settings[key] = QByteArray.fromBase64(value.encode('utf-8'))
-                        except:
-                            self._settings[key] = None
-                    else:
-                        self._settings[key] = value
+                # Convert the base64 string back to QByteArray for geometry
+                geometry = loaded_settings.get("window_geometry")
+                if isinstance(geometry, str):
+                    try:
+                        loaded_settings["window_geometry"] = QByteArray(binascii.a2b_base64(geometry))
+                    except:
+                        loaded_settings["window_geometry"] = None
+                self._settings.update(loaded_settings)
                 return True
         except Exception as e:
             print(f"Error loading settings: {e}")
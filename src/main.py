@@ -12,24 +12,19 @@ Author: Audio Streamer Team
 import sys
 import os
 import signal
+import socket
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QSocketNotifier
 from PySide6.QtGui import QIcon
 
-# Add paths for module resolution
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-ui_dir = os.path.join(current_dir, 'ui')
-core_dir = os.path.join(current_dir, 'core')
-
-# Add all necessary paths
-for path in [current_dir, parent_dir, ui_dir, core_dir]:
-    if path not in sys.path:
-        sys.path.insert(0, path)
+# Make the project root importable so the src package resolves when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
 # Import required modules
-from ui.main_window import MainWindow
-from ui.theme import apply_theme
+from src.ui.main_window import MainWindow
+from src.ui.theme import apply_theme
 
 
 def get_icon_path():
@@ -45,6 +40,10 @@ def get_icon_path():
 
 def setup_application():
     """Setup and configure the QApplication"""
+    # Fold bursts of mouse-move/resize/tablet events into one before Python handles them
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressHighFrequencyEvents, True)
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressTabletEvents, True)
+    
     # Create application
     app = QApplication(sys.argv)
     
@@ -75,11 +74,24 @@ def setup_signal_handlers(window):
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    # Enable periodic processing of signals in Qt
-    timer = QTimer()
-    timer.timeout.connect(lambda: None)  # Allow Python signal handlers to run
-    timer.start(500)  # Check every 500ms
-    return timer
+    # Wake the Qt event loop only when a signal arrives, so Python handlers can run
+    read_sock, write_sock = socket.socketpair()
+    read_sock.setblocking(False)
+    write_sock.setblocking(False)
+    signal.set_wakeup_fd(write_sock.fileno())
+    
+    def drain_wakeup_socket():
+        try:
+            read_sock.recv(4096)
+        except BlockingIOError:
+            pass
+    
+    notifier = QSocketNotifier(read_sock.fileno(), QSocketNotifier.Type.Read)
+    notifier.activated.connect(drain_wakeup_socket)
+    
+    # Keep the sockets alive for as long as the notifier
+    notifier.sockets = (read_sock, write_sock)
+    return notifier
 
 
 def main():
@@ -99,7 +111,7 @@ def main():
         window.show()
         
         # Setup signal handlers for Ctrl+C
-        signal_timer = setup_signal_handlers(window)
+        signal_notifier = setup_signal_handlers(window)
         
         # Start event loop
         sys.exit(app.exec())
@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QComboBox, QPushButton, QFrame, QMessageBox, QSizePolicy, QWidget)
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QSignalBlocker
 from PySide6.QtGui import QFont
 
 
@@ -29,9 +29,16 @@ class DeviceConfigDialog(QDialog):
         # Flag to prevent signal emission during initial setup
         self.loading = True
         
+        # Combo boxes are filled lazily, right before they are first needed
+        self.combos_stale = True
+        
+        # display_name -> row lookups for each combo box, rebuilt on every populate
+        self.input_item_indices = {}
+        self.output_item_indices = {}
+        self.midi_item_indices = {}
+        
         self.setup_ui()
         self.setup_connections()
-        self.populate_device_combos()
         
         # Enable signal emission now that setup is complete
         self.loading = False
@@ -171,56 +178,77 @@ class DeviceConfigDialog(QDialog):
     
     def populate_device_combos(self):
         """Populate all device combo boxes"""
+        self.setUpdatesEnabled(False)  # One repaint for all three combos
         self.populate_input_devices()
         self.populate_output_devices()
         self.populate_midi_devices()
+        self.setUpdatesEnabled(True)
+        self.combos_stale = False
+    
+    def ensure_device_combos(self):
+        """Populate the combo boxes if the device maps changed since they were filled"""
+        if self.combos_stale:
+            loading = self.loading
+            self.loading = True  # Prevent signals during update
+            self.populate_device_combos()
+            self.loading = loading
+    
+    def showEvent(self, event):
+        """Fill the combo boxes before the dialog becomes visible"""
+        self.ensure_device_combos()
+        super().showEvent(event)
     
     def populate_input_devices(self):
         """Populate the input device combo box"""
-        self.input_device_combo.clear()
-        self.input_device_combo.setEnabled(True)
-        
-        if not self.input_device_map:
-            self.input_device_combo.addItem("No input devices found")
-            self.input_device_combo.setEnabled(False)
-        else:
-            for display_name in self.input_device_map.keys():
-                self.input_device_combo.addItem(display_name)
+        # Fill the combo in one batch without emitting a change per intermediate item
+        with QSignalBlocker(self.input_device_combo):
+            self.input_device_combo.clear()
+            self.input_device_combo.setEnabled(True)
+            
+            if not self.input_device_map:
+                self.input_device_combo.addItem("No input devices found")
+                self.input_device_combo.setEnabled(False)
+                self.input_item_indices = {}
+            else:
+                items = list(self.input_device_map.keys())
+                self.input_device_combo.addItems(items)
+                self.input_item_indices = {name: index for index, name in enumerate(items)}
     
     def populate_output_devices(self):
         """Populate the output device combo box"""
-        self.output_device_combo.clear()
-        self.output_device_combo.setEnabled(True)
-        
-        # Always add "Default Output" first
-        self.output_device_combo.addItem("Default Output")
-        
-        # Add other output devices
-        for display_name in self.output_device_map.keys():
-            if display_name != "Default Output":  # Avoid duplicates
-                self.output_device_combo.addItem(display_name)
+        with QSignalBlocker(self.output_device_combo):
+            self.output_device_combo.clear()
+            self.output_device_combo.setEnabled(True)
+            
+            # Always add "Default Output" first, then the other output devices (avoiding duplicates)
+            items = ["Default Output"] + [name for name in self.output_device_map.keys() if name != "Default Output"]
+            self.output_device_combo.addItems(items)
+            self.output_item_indices = {name: index for index, name in enumerate(items)}
     
     def populate_midi_devices(self):
         """Populate the MIDI device combo box"""
-        self.midi_device_combo.clear()
-        self.midi_device_combo.setEnabled(True)
-        
-        # Always add "No MIDI" first
-        self.midi_device_combo.addItem("No MIDI")
-        
-        # Add MIDI devices (skip "No MIDI" to avoid duplicates)
-        for display_name in self.midi_device_map.keys():
-            if display_name != "No MIDI":
-                self.midi_device_combo.addItem(display_name)
+        with QSignalBlocker(self.midi_device_combo):
+            self.midi_device_combo.clear()
+            self.midi_device_combo.setEnabled(True)
+            
+            # Always add "No MIDI" first, then the MIDI devices (avoiding duplicates)
+            items = ["No MIDI"] + [name for name in self.midi_device_map.keys() if name != "No MIDI"]
+            self.midi_device_combo.addItems(items)
+            self.midi_item_indices = {name: index for index, name in enumerate(items)}
     
     def update_device_maps(self, input_device_map, output_device_map, midi_device_map):
         """Update device mappings and repopulate combo boxes"""
-        self.loading = True  # Prevent signals during update
-        
         self.input_device_map = input_device_map
         self.output_device_map = output_device_map
         self.midi_device_map = midi_device_map
         
+        # A hidden dialog only needs its combos when it is shown again
+        if not self.isVisible():
+            self.combos_stale = True
+            return
+        
+        self.loading = True  # Prevent signals during update
+        
         # Store current selections before repopulating
         current_input = self.input_device_combo.currentText()
         current_output = self.output_device_combo.currentText()
@@ -230,29 +258,32 @@ class DeviceConfigDialog(QDialog):
         self.populate_device_combos()
         
         # Restore selections if they still exist
-        if current_input and self.input_device_combo.findText(current_input) >= 0:
-            self.input_device_combo.setCurrentText(current_input)
-        
-        if current_output and self.output_device_combo.findText(current_output) >= 0:
-            self.output_device_combo.setCurrentText(current_output)
-            
-        if current_midi and self.midi_device_combo.findText(current_midi) >= 0:
-            self.midi_device_combo.setCurrentText(current_midi)
+        self.restore_selection(self.input_device_combo, self.input_item_indices, current_input)
+        self.restore_selection(self.output_device_combo, self.output_item_indices, current_output)
+        self.restore_selection(self.midi_device_combo, self.midi_item_indices, current_midi)
         
         self.loading = False  # Re-enable signals
     
+    def restore_selection(self, combo, item_indices, display_name):
+        """Reselect display_name in combo without emitting change signals"""
+        index = item_indices.get(display_name)
+        if index is not None:
+            with QSignalBlocker(combo):
+                combo.setCurrentIndex(index)
+    
     def set_current_devices(self, input_device, output_device, midi_device):
         """Set the currently selected devices in the combo boxes"""
+        self.ensure_device_combos()
         self.loading = True  # Prevent signals during update
         
-        if input_device and self.input_device_combo.findText(input_device) >= 0:
-            self.input_device_combo.setCurrentText(input_device)
+        if input_device in self.input_item_indices:
+            self.input_device_combo.setCurrentIndex(self.input_item_indices[input_device])
             
-        if output_device and self.output_device_combo.findText(output_device) >= 0:
-            self.output_device_combo.setCurrentText(output_device)
+        if output_device in self.output_item_indices:
+            self.output_device_combo.setCurrentIndex(self.output_item_indices[output_device])
             
-        if midi_device and self.midi_device_combo.findText(midi_device) >= 0:
-            self.midi_device_combo.setCurrentText(midi_device)
+        if midi_device in self.midi_item_indices:
+            self.midi_device_combo.setCurrentIndex(self.midi_item_indices[midi_device])
         
         self.loading = False  # Re-enable signals
     
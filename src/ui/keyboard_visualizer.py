@@ -1,11 +1,20 @@
 from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel, QSizePolicy
-from PySide6.QtGui import QColor, QPainter, QPainterPath
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QBrush, QPen, QRegion, QPixmap, QPalette
+from PySide6.QtCore import Qt, QSize, QRect, QEvent
 
 from src.core.settings_manager import SettingsManager
 from src.ui.piano_layout import PianoLayout
 from src.ui.piano_roll import DEFAULT_GRADIENT_CONFIG
 
+# Bit i is set for key index i (0-87) when that key is a black key
+BLACK_KEY_MASK = sum(1 << i for i in range(PianoLayout.NUM_KEYS)
+                     if PianoLayout.is_black_key(PianoLayout.key_index_to_midi_note(i)))
+WHITE_KEY_MASK = ((1 << PianoLayout.NUM_KEYS) - 1) & ~BLACK_KEY_MASK
+
+# Key bit for each MIDI note 0-127, 0 for notes outside the keyboard (MIDI note 21 is A0)
+NOTE_KEY_BITS = tuple(1 << (midi_note - 21) if 0 <= midi_note - 21 < PianoLayout.NUM_KEYS else 0
+                      for midi_note in range(128))
+
 class KeyboardVisualizer(QWidget):
     def __init__(self, parent=None, settings_manager: SettingsManager=None):
         super().__init__(parent)
@@ -17,38 +26,70 @@ class KeyboardVisualizer(QWidget):
         self.setMaximumHeight(100)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
-        # Initialize key states (88 keys for a standard piano)
-        self.key_states = [False] * 88
+        # paintEvent covers every pixel with the opaque base pixmap, skip Qt's background fill
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.setAttribute(Qt.WA_NoSystemBackground, True)
 
-    def highlight_key_on(self, midi_note):
-        """Highlight a key when a MIDI note is pressed."""
-        key_index = midi_note - 21  # MIDI note 21 corresponds to A0
-        if 0 <= key_index < len(self.key_states):
-            self.key_states[key_index] = True
-            self.update()
+        # Pressed keys as a bitmask, bit i for key index i (88 keys for a standard piano)
+        self.key_states = 0
 
-    def highlight_key_off(self, midi_note):
-        """Unhighlight a key when a MIDI note is released."""
-        key_index = midi_note - 21
-        if 0 <= key_index < len(self.key_states):
-            self.key_states[key_index] = False
-            self.update()
+        # Paint resources, created once
+        self.key_pen = QPen(Qt.black)
+        self.white_key_brush = QBrush(QColor(255, 255, 255))
+        self.black_key_brush = QBrush(QColor(0, 0, 0))
 
-    def paintEvent(self, event):
-        """Custom paint event to draw the keyboard."""
+        # Key geometry for the current size, rebuilt on resize
+        self.key_rects = []        # Rect per key index
+        self.white_key_rects = []  # Rects of all white keys
+        self.black_key_rects = []  # Rects of all black keys
+        self.clip_path = QPainterPath()
+        self.corner_path = QPainterPath()  # Widget area outside clip_path (the rounded-off corners)
+        self.clip_path_fullscreen = None  # Fullscreen state clip_path was built for
+        self.base_pixmap = None  # Idle keyboard rendered once, rebuilt lazily after a resize
+
+        # Pressed key color from the gradient config, recomputed only when it changes
+        self.update_active_color()
+        self.settings_manager.setting_changed.connect(self.on_setting_changed)
+
+    def update_active_color(self):
+        """Cache the pressed key color from the gradient config."""
         gradient_config = { **DEFAULT_GRADIENT_CONFIG, **self.settings_manager.get_gradient_config() }
-        active_color = QColor(*gradient_config["colors"][2])
-        painter = QPainter(self)
-        
+        try:
+            self.active_color = QColor(*gradient_config["colors"][2])
+        except (IndexError, KeyError, TypeError):
+            # Malformed config, fall back to the default pressed key color
+            self.active_color = QColor(*DEFAULT_GRADIENT_CONFIG["colors"][2])
+        self.active_key_brush = QBrush(self.active_color)
+
+    def update_key_geometry(self):
+        """Compute the key rectangles (whole pixels, as drawn so far) for the current widget size."""
+        key_height = self.height()
+        black_key_height = int(key_height * PianoLayout.BLACK_KEY_HEIGHT_RATIO)
+        self.key_rects = [
+            QRect(int(key_info.x), 0, int(key_info.width), black_key_height if key_info.is_black else key_height)
+            for key_info in PianoLayout.get_all_key_info(self.width())
+        ]
+        self.white_key_rects = self.rects_for_keys(WHITE_KEY_MASK)
+        self.black_key_rects = self.rects_for_keys(BLACK_KEY_MASK)
+
+    def rects_for_keys(self, mask):
+        """Return the rects of the keys whose bits are set in mask."""
+        key_rects = self.key_rects
+        rects = []
+        while mask:
+            lowest = mask & -mask
+            rects.append(key_rects[lowest.bit_length() - 1])
+            mask ^= lowest
+        return rects
+
+    def update_clip_path(self):
+        """Build the clipping region: a rectangle with only the bottom corners rounded."""
         total_width = self.width()
         key_height = self.height()
 
         # Define the roundness as an adjustable variable
-        corner_radius = 0 if self.fullscreen else 8 
-
-        painter.setRenderHint(QPainter.Antialiasing)
+        corner_radius = 0 if self.fullscreen else 8
 
-        # Define the clipping region as a rounded rectangle with only bottom corners rounded
         clipping_path = QPainterPath()
         clipping_path.moveTo(0, 0)
         clipping_path.lineTo(total_width, 0)
@@ -57,31 +98,127 @@ class KeyboardVisualizer(QWidget):
         clipping_path.lineTo(corner_radius, key_height)
         clipping_path.quadTo(0, key_height, 0, key_height - corner_radius)
         clipping_path.lineTo(0, 0)
-        painter.setClipPath(clipping_path)
-
-        # Get all key information using the piano layout system
-        all_key_info = PianoLayout.get_all_key_info(total_width)
-        
-        # Draw white keys first (background layer)
-        painter.setPen(Qt.black)
-        for i, key_info in enumerate(all_key_info):
-            if not key_info.is_black:  # White keys
-                if self.key_states[i]:
-                    painter.setBrush(active_color)
-                else:
-                    painter.setBrush(QColor(255, 255, 255))
-                
-                painter.drawRect(key_info.x, 0, key_info.width, key_height)
-        
-        # Draw black keys second (overlay layer)
-        black_key_height = key_height * PianoLayout.BLACK_KEY_HEIGHT_RATIO
-        for i, key_info in enumerate(all_key_info):
-            if key_info.is_black:  # Black keys
-                if self.key_states[i]:
-                    painter.setBrush(active_color)
-                else:
-                    painter.setBrush(QColor(0, 0, 0))
-                
-                painter.drawRect(key_info.x, 0, key_info.width, black_key_height)
+        self.clip_path = clipping_path
+        self.clip_path_fullscreen = self.fullscreen
+
+        widget_path = QPainterPath()
+        widget_path.addRect(0, 0, total_width, key_height)
+        self.corner_path = widget_path.subtracted(clipping_path)
+
+    def paint_corners(self, painter):
+        """Round off the bottom corners by covering them with the background color."""
+        painter.setRenderHint(QPainter.Antialiasing)  # Only the corner curves are antialiased
+        painter.fillPath(self.corner_path, self.palette().color(QPalette.ColorRole.Window))
+        painter.setRenderHint(QPainter.Antialiasing, False)
+
+    def update_base_pixmap(self):
+        """Render the idle keyboard (all keys unpressed, clipped corners) into a pixmap."""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(self.palette().color(QPalette.ColorRole.Window))  # Shows in the rounded corners
+
+        # Keys are pixel-aligned rects and are drawn without antialiasing
+        painter = QPainter(pixmap)
+        painter.setPen(self.key_pen)
+        painter.setBrush(self.white_key_brush)
+        painter.drawRects(self.white_key_rects)
+        painter.setBrush(self.black_key_brush)
+        painter.drawRects(self.black_key_rects)
+        self.paint_corners(painter)
+        painter.end()
+
+        self.base_pixmap = pixmap
+
+    def resizeEvent(self, event):
+        """Rebuild the cached key geometry and clip path for the new size."""
+        super().resizeEvent(event)
+        self.update_key_geometry()
+        self.update_clip_path()
+        self.base_pixmap = None
+
+    def update_keys(self, changed_mask):
+        """Schedule a repaint of only the keys whose bits are set in changed_mask."""
+        # A hidden keyboard is painted in full when shown again, only the mask needs updating
+        if not changed_mask or not self.key_rects or not self.isVisible():
+            return
+        region = QRegion()
+        for rect in self.rects_for_keys(changed_mask):
+            # Grow by a pixel, the 1 px pen outline extends past the rect
+            region = region.united(rect.adjusted(-1, -1, 1, 1))
+        self.update(region)
+
+    def changeEvent(self, event):
+        """Rebuild the base pixmap when the background color behind the corners changes."""
+        if event.type() == QEvent.PaletteChange:
+            self.base_pixmap = None
+            self.update()
+        super().changeEvent(event)
+
+    def on_setting_changed(self, key):
+        """Refresh the cached color when the gradient config changes."""
+        if key == 'gradient_config':
+            self.update_active_color()
+            self.update()
+
+    def highlight_key_on(self, midi_note):
+        """Highlight a key when a MIDI note is pressed."""
+        key_bit = NOTE_KEY_BITS[midi_note]
+        if key_bit:
+            self.key_states |= key_bit
+            self.update_keys(key_bit)
+
+    def highlight_key_off(self, midi_note):
+        """Unhighlight a key when a MIDI note is released."""
+        key_bit = NOTE_KEY_BITS[midi_note]
+        if key_bit:
+            self.key_states &= ~key_bit
+            self.update_keys(key_bit)
+
+    def apply_note_batch(self, notes):
+        """Update keys for a batch of (midi_note, velocity) events, velocity 0 releasing the key."""
+        key_states = self.key_states
+        for midi_note, velocity in notes:
+            # Notes outside the keyboard have a zero bit and leave the mask unchanged
+            if velocity > 0:
+                key_states |= NOTE_KEY_BITS[midi_note]
+            else:
+                key_states &= ~NOTE_KEY_BITS[midi_note]
+        changed_mask = self.key_states ^ key_states
+        self.key_states = key_states
+        self.update_keys(changed_mask)
+
+    def paintEvent(self, event):
+        """Custom paint event to draw the keyboard."""
+        # The fullscreen flag can change without a resize, rebuild the clip path then
+        if self.clip_path_fullscreen != self.fullscreen:
+            self.update_clip_path()
+            self.base_pixmap = None
+        if self.base_pixmap is None:
+            self.update_base_pixmap()
+
+        painter = QPainter(self)
+
+        # The idle keyboard comes from the cached pixmap, only pressed keys are drawn on top
+        painter.drawPixmap(0, 0, self.base_pixmap)
+
+        key_states = self.key_states
+        if key_states:
+            painter.setPen(self.key_pen)
+
+            # Pressed white keys first, then restore the black keys they overlap
+            if key_states & WHITE_KEY_MASK:
+                painter.setBrush(self.active_key_brush)
+                painter.drawRects(self.rects_for_keys(key_states & WHITE_KEY_MASK))
+                painter.setBrush(self.black_key_brush)
+                painter.drawRects(self.black_key_rects)
+
+            # Pressed black keys last (overlay layer)
+            if key_states & BLACK_KEY_MASK:
+                painter.setBrush(self.active_key_brush)
+                painter.drawRects(self.rects_for_keys(key_states & BLACK_KEY_MASK))
+
+            # Pressed keys at either end would otherwise square off the rounded corners
+            self.paint_corners(painter)
 
         painter.end()
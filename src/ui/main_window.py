@@ -1,24 +1,47 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QComboBox, QPushButton, QFrame, QMessageBox, QSizePolicy, QApplication, QSpinBox)
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
+from PySide6.QtCore import Qt, QTimer, QThread, Signal, Slot, QEvent
 from PySide6.QtGui import QIcon, QFont, QKeySequence, QShortcut
 
-# Handle imports for both direct execution and package imports
-try:
-    from ..core.audio_manager import AudioManager, AudioDevice
-    from ..core.settings_manager import SettingsManager
-    from ..core.midi_manager import MIDIManager, MIDIDevice
-    # Defer spectrum analyzer import to reduce startup time
-except ImportError:
-    # For direct execution from src directory
-    import sys
-    import os
-    current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    sys.path.insert(0, current_dir)
-    from core.audio_manager import AudioManager, AudioDevice
-    from core.settings_manager import SettingsManager
-    from core.midi_manager import MIDIManager, MIDIDevice
-    # Defer spectrum analyzer import to reduce startup time
+from ..core.audio_manager import AudioManager, AudioDevice
+from ..core.settings_manager import SettingsManager
+from ..core.midi_manager import MIDIManager, MIDIDevice
+# Defer spectrum analyzer import to reduce startup time
+
+
+# Piano roll scroll speed presets (combo box text <-> pixels per second)
+SCROLL_SPEED_BY_TEXT = {
+    "Slower": 50,
+    "Slow": 75,
+    "Normal": 100,
+    "Fast": 200,
+    "Faster": 400
+}
+SCROLL_SPEED_TEXT_BY_VALUE = {speed: text for text, speed in SCROLL_SPEED_BY_TEXT.items()}
+
+
+# Toolbar button stylesheets, built once and shared by every window instance
+TOOLBAR_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #2d2d2d;
+        border: 1px solid #555;
+        border-radius: 4px;
+        color: #ffffff;
+        font-size: 11px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: %s;
+        border-color: #777;
+    }
+    QPushButton:pressed {
+        background-color: #1a1a1a;
+    }
+"""
+SETTINGS_BUTTON_STYLE = TOOLBAR_BUTTON_STYLE % "#2d4a2d"
+DEVICES_BUTTON_STYLE = TOOLBAR_BUTTON_STYLE % "#2d2d4a"
+PLAY_PAUSE_BUTTON_STYLE = TOOLBAR_BUTTON_STYLE % "#353535"
+CLEAR_BUTTON_STYLE = TOOLBAR_BUTTON_STYLE % "#4a2d2d"
 
 
 class DeviceLoadWorker(QThread):
@@ -37,9 +60,18 @@ class DeviceLoadWorker(QThread):
         try:
             input_devices, output_devices = self.audio_manager.refresh_devices()
             midi_devices = self.midi_manager.refresh_devices()
+            self.preload_visualization_modules()
             self.devices_loaded.emit(input_devices, output_devices, midi_devices)
         except Exception as e:
             self.error_occurred.emit(str(e))
+    
+    def preload_visualization_modules(self):
+        """Import the visualization modules (numpy/scipy) here so the GUI thread doesn't have to"""
+        try:
+            from . import spectrum_analyzer, piano_roll
+        except Exception as e:
+            # The GUI thread retries the import and reports the error itself
+            print(f"Failed to preload visualization modules: {e}")
 
 
 class MainWindow(QMainWindow):
@@ -84,6 +116,20 @@ class MainWindow(QMainWindow):
         self.midi_device_map = {}   # Maps display names to MIDI device objects
         self.show_piano_roll = True  # Toggle between spectrum and piano roll
         
+        # Coalesce keyboard height updates during window resizes to one per frame
+        self.keyboard_resize_timer = QTimer(self)
+        self.keyboard_resize_timer.setSingleShot(True)
+        self.keyboard_resize_timer.timeout.connect(self.apply_keyboard_height)
+        
+        # Coalesce mute button restyles (stop/start bursts) into one repolish
+        self.mute_button_polish_timer = QTimer(self)
+        self.mute_button_polish_timer.setSingleShot(True)
+        self.mute_button_polish_timer.timeout.connect(self.polish_mute_button)
+        
+        # Log audio stream status (xruns) off the audio thread while streaming
+        self.stream_status_timer = QTimer(self)
+        self.stream_status_timer.timeout.connect(self.log_stream_status)
+        
         # Setup window
         self.setWindowTitle("Midivis")
         
@@ -201,19 +247,16 @@ class MainWindow(QMainWindow):
         if self.spectrum_analyzer is None:
             try:
                 # Import spectrum analyzer only when needed
-                try:
-                    from .spectrum_analyzer import SpectrumAnalyzer
-                except ImportError:
-                    from ui.spectrum_analyzer import SpectrumAnalyzer
+                from .spectrum_analyzer import SpectrumAnalyzer
                 
                 self.spectrum_analyzer = SpectrumAnalyzer(parent=central_widget)
                 self.spectrum_analyzer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
                 self.spectrum_analyzer.fullscreen = self.isFullScreen()  # Set fullscreen state
                 self.spectrum_analyzer.setMinimumHeight(200)
                 
-                # Connect audio signal
-                if hasattr(self.audio_manager, 'audio_data_ready'):
-                    self.audio_manager.audio_data_ready.connect(self.spectrum_analyzer.add_audio_data)
+                # Lives in the layout for good, update_visualization_widget only shows/hides it
+                self.spectrum_analyzer.hide()
+                self.visualizer_layout.addWidget(self.spectrum_analyzer, 1)
                     
             except Exception as e:
                 print(f"Failed to initialize spectrum analyzer: {e}")
@@ -221,19 +264,18 @@ class MainWindow(QMainWindow):
         if self.piano_roll is None:
             try:
                 # Import piano roll only when needed
-                try:
-                    from .piano_roll import PianoRollWidget
-                except ImportError:
-                    from ui.piano_roll import PianoRollWidget
+                from .piano_roll import PianoRollWidget
                 
                 self.piano_roll = PianoRollWidget(parent=central_widget, settings_manager=self.settings_manager)
                 self.piano_roll.fullscreen = self.isFullScreen()
                 self.piano_roll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
                 self.piano_roll.setMinimumHeight(200)
+                self.piano_roll.hide()
+                self.visualizer_layout.addWidget(self.piano_roll, 1)
                 
-                # Connect MIDI signals
-                self.midi_manager.note_on.connect(self.piano_roll.add_note_on)
-                self.midi_manager.note_off.connect(self.piano_roll.add_note_off)
+                # Receive MIDI notes directly, the piano roll applies them on its next frame
+                self.midi_manager.note_on_callback = self.piano_roll.queue_note_on
+                self.midi_manager.note_off_callback = self.piano_roll.queue_note_off
                 
                 # Apply saved scroll speed to the newly created piano roll
                 saved_speed = self.settings_manager.get_scroll_speed()
@@ -295,46 +337,14 @@ class MainWindow(QMainWindow):
         self.particles_button = QPushButton("Settings")
         self.particles_button.setFixedSize(75, 30)  # Increased width from 70 to 85
         self.particles_button.setToolTip("Configure piano roll effects and gradients")
-        self.particles_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2d2d2d;
-                border: 1px solid #555;
-                border-radius: 4px;
-                color: #ffffff;
-                font-size: 11px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2d4a2d;
-                border-color: #777;
-            }
-            QPushButton:pressed {
-                background-color: #1a1a1a;
-            }
-        """)
+        self.particles_button.setStyleSheet(SETTINGS_BUTTON_STYLE)
         toolbar_row.addWidget(self.particles_button)
         
         # Devices button
         self.devices_button = QPushButton("Devices")
         self.devices_button.setFixedSize(70, 30)
         self.devices_button.setToolTip("Configure audio and MIDI devices")
-        self.devices_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2d2d2d;
-                border: 1px solid #555;
-                border-radius: 4px;
-                color: #ffffff;
-                font-size: 11px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2d2d4a;
-                border-color: #777;
-            }
-            QPushButton:pressed {
-                background-color: #1a1a1a;
-            }
-        """)
+        self.devices_button.setStyleSheet(DEVICES_BUTTON_STYLE)
         toolbar_row.addWidget(self.devices_button)
         
         # Add stretch to push right-aligned controls to the right
@@ -346,50 +356,18 @@ class MainWindow(QMainWindow):
         self.play_pause_button = QPushButton("Pause")
         self.play_pause_button.setFixedSize(60, 30)
         self.play_pause_button.setToolTip("Play/Pause piano roll")
-        self.play_pause_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2d2d2d;
-                border: 1px solid #555;
-                border-radius: 4px;
-                color: #ffffff;
-                font-size: 11px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #353535;
-                border-color: #777;
-            }
-            QPushButton:pressed {
-                background-color: #1a1a1a;
-            }
-        """)
+        self.play_pause_button.setStyleSheet(PLAY_PAUSE_BUTTON_STYLE)
         toolbar_row.addWidget(self.play_pause_button)
         
         self.clear_button = QPushButton("Clear")
         self.clear_button.setFixedSize(50, 30)
         self.clear_button.setToolTip("Clear all notes")
-        self.clear_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2d2d2d;
-                border: 1px solid #555;
-                border-radius: 4px;
-                color: #ffffff;
-                font-size: 11px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #4a2d2d;
-                border-color: #777;
-            }
-            QPushButton:pressed {
-                background-color: #1a1a1a;
-            }
-        """)
+        self.clear_button.setStyleSheet(CLEAR_BUTTON_STYLE)
         toolbar_row.addWidget(self.clear_button)
 
         # Scroll speed control
         self.scroll_speed_input = QComboBox()
-        self.scroll_speed_input.addItems(["Slower", "Slow", "Normal", "Fast", "Faster"])
+        self.scroll_speed_input.addItems(list(SCROLL_SPEED_BY_TEXT))
         self.scroll_speed_input.setCurrentText("Normal")  # Default to normal speed
         self.scroll_speed_input.setMinimumHeight(30)
         self.scroll_speed_input.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
@@ -462,20 +440,6 @@ class MainWindow(QMainWindow):
         
         layout.addWidget(visualizer_widget)
         
-        # Initialize device combo boxes for internal use (not displayed)
-        self.input_device_combo = QComboBox()
-        self.input_device_combo.addItem("Loading input devices...")
-        self.input_device_combo.setEnabled(False)
-        
-        self.output_device_combo = QComboBox()
-        self.output_device_combo.addItem("Loading output devices...")
-        self.output_device_combo.setEnabled(False)
-        
-        self.midi_device_combo = QComboBox()
-        self.midi_device_combo.addItem("Loading MIDI devices...")
-        self.midi_device_combo.setEnabled(False)
-
-        
         # Will be replaced later
         self.spectrum_analyzer = None
         self.piano_roll = None
@@ -490,9 +454,8 @@ class MainWindow(QMainWindow):
             self.keyboard_visualizer.setMinimumHeight(50)
             layout.addWidget(self.keyboard_visualizer)
 
-            # Connect MIDI signals to the keyboard visualizer
-            self.midi_manager.note_on.connect(self.keyboard_visualizer.highlight_key_on)
-            self.midi_manager.note_off.connect(self.keyboard_visualizer.highlight_key_off)
+            # Connect MIDI notes to the keyboard visualizer, one repaint per batch of notes
+            self.midi_manager.notes_batch.connect(self.keyboard_visualizer.apply_note_batch)
         
         except Exception as e:
             print(f"Failed to initialize keyboard visualizer: {e}")
@@ -504,7 +467,10 @@ class MainWindow(QMainWindow):
         self.audio_manager.streaming_started.connect(self.on_streaming_started)
         self.audio_manager.streaming_stopped.connect(self.on_streaming_stopped)
         self.audio_manager.error_occurred.connect(self.show_error)
-        # Note: audio_data_ready connection will be made when spectrum analyzer is initialized
+        # Connected before any stream opens, queued so the audio thread only posts a notification.
+        # The slot always reads the ring, which re-arms the coalesced notification.
+        self.audio_manager.audio_data_available.connect(
+            self.on_audio_data_available, Qt.ConnectionType.QueuedConnection)
         
         # MIDI manager signals
         self.midi_manager.error_occurred.connect(self.show_error)
@@ -523,7 +489,7 @@ class MainWindow(QMainWindow):
         self.demo_shortcut = QShortcut(QKeySequence(Qt.Key.Key_F8), self)
         self.demo_shortcut.activated.connect(self.start_demo_mode)
         self.reload_shortcut = QShortcut(QKeySequence(Qt.Key.Key_F5), self)
-        self.reload_shortcut.activated.connect(self.start_device_loading)
+        self.reload_shortcut.activated.connect(self.refresh_devices)
         self.fullscreen_shortcut = QShortcut(QKeySequence(Qt.Key.Key_F11), self)
         self.fullscreen_shortcut.activated.connect(self.toggle_fullscreen)
         self.toolbar_shortcut = QShortcut(QKeySequence(Qt.Key.Key_F9), self)
@@ -542,7 +508,6 @@ class MainWindow(QMainWindow):
             
             # Save the device selection
             self.settings_manager.set_last_input_device(display_name)  # Save display name
-            self.settings_manager.save_settings()
             
             # Restart streaming with new device
             self.restart_streaming()
@@ -560,7 +525,6 @@ class MainWindow(QMainWindow):
             
             # Save the device selection
             self.settings_manager.set_last_output_device(display_name)
-            self.settings_manager.save_settings()
             
             # Restart streaming with new device
             self.restart_streaming()
@@ -584,13 +548,11 @@ class MainWindow(QMainWindow):
                 success = self.midi_manager.start_listening(new_device)
                 if success:
                     self.settings_manager.set_last_midi_device(display_name)
-                    self.settings_manager.save_settings()
                 else:
                     self.current_midi_device = None  # Reset on failure
             else:
                 # "No MIDI" selected
                 self.settings_manager.set_last_midi_device("")
-                self.settings_manager.save_settings()
     
     def restart_streaming(self):
         """Restart audio streaming with current devices"""
@@ -600,22 +562,13 @@ class MainWindow(QMainWindow):
     def on_scroll_speed_changed(self, speed_text: str):
         """Handle scroll speed change"""
         # Convert text selection to speed value
-        speed_map = {
-            "Slower": 50,
-            "Slow": 75,
-            "Normal": 100,
-            "Fast": 200,
-            "Faster": 400
-        }
-        
-        speed = speed_map.get(speed_text, 100)  # Default to 100 if not found
+        speed = SCROLL_SPEED_BY_TEXT.get(speed_text, 100)  # Default to 100 if not found
         
         if self.piano_roll:
             self.piano_roll.set_scroll_speed(float(speed))
         
         # Save the scroll speed setting
         self.settings_manager.set_scroll_speed(speed)
-        self.settings_manager.save_settings()
     
     def on_midi_delay_changed(self, delay_ms: int):
         """Handle MIDI delay change"""
@@ -624,7 +577,6 @@ class MainWindow(QMainWindow):
         
         # Save the MIDI delay setting
         self.settings_manager.set_midi_delay(delay_ms)
-        self.settings_manager.save_settings()
     
     def toggle_piano_roll_playback(self):
         """Toggle piano roll play/pause state"""
@@ -703,11 +655,8 @@ class MainWindow(QMainWindow):
         if not self.piano_roll:
             return
         
-        try:
-            # Import the piano roll config dialog
-            from .particle_config_dialog import PianoRollConfigDialog
-        except ImportError:
-            from ui.particle_config_dialog import PianoRollConfigDialog
+        # Import the piano roll config dialog
+        from .particle_config_dialog import PianoRollConfigDialog
         
         # Create and show the dialog
         dialog = PianoRollConfigDialog(self.piano_roll, self)
@@ -720,11 +669,8 @@ class MainWindow(QMainWindow):
                                    "Devices are still loading. Please wait a moment and try again.")
             return
         
-        try:
-            # Import the device config dialog
-            from .device_config_dialog import DeviceConfigDialog
-        except ImportError:
-            from ui.device_config_dialog import DeviceConfigDialog
+        # Import the device config dialog
+        from .device_config_dialog import DeviceConfigDialog
         
         # Create the dialog if it doesn't exist
         if not self.device_config_dialog:
@@ -793,6 +739,14 @@ class MainWindow(QMainWindow):
         self.devices_loaded = False
         self.start_device_loading()
     
+    @Slot()
+    def on_audio_data_available(self):
+        """Pull the newest input samples from the audio ring and feed the spectrum analyzer"""
+        # Read even without an analyzer so the next callback notifies again
+        audio_data = self.audio_manager.read_audio_data()
+        if audio_data is not None and self.spectrum_analyzer:
+            self.spectrum_analyzer.add_audio_data(audio_data)
+    
     def try_start_streaming(self):
         """Try to start streaming with current devices"""
         if not self.devices_loaded or not self.current_input_device:
@@ -803,45 +757,69 @@ class MainWindow(QMainWindow):
         
         self.audio_manager.start_streaming(self.current_input_device, output_device)
     
+    @Slot()
     def toggle_mute(self):
         """Toggle mute state"""
         is_muted = self.audio_manager.toggle_mute()
         
         if is_muted:
             self.mute_button.setText("Muted")
-            self.mute_button.setProperty("muted", True)
+            self.set_mute_button_muted(True)
             self.mute_button.setToolTip("Click to unmute")
         else:
             self.mute_button.setText("Streaming")
-            self.mute_button.setProperty("muted", False)
+            self.set_mute_button_muted(False)
             self.mute_button.setToolTip("Click to mute")
-        
-        # Refresh button style
+    
+    def set_mute_button_muted(self, muted: bool):
+        """Set the "muted" style property, restyling only when its value actually changes"""
+        if self.mute_button.property("muted") == muted:
+            return
+        self.mute_button.setProperty("muted", muted)
+        self.schedule_mute_button_polish()
+    
+    def schedule_mute_button_polish(self):
+        """Refresh the mute button style at most once every 50ms"""
+        if not self.mute_button_polish_timer.isActive():
+            self.mute_button_polish_timer.start(50)
+    
+    def polish_mute_button(self):
+        """Re-apply the stylesheet so the "muted" property takes effect"""
         self.mute_button.style().unpolish(self.mute_button)
         self.mute_button.style().polish(self.mute_button)
     
+    @Slot(str, str)
     def update_status(self, message: str, color: str):
         """Update status in the window title"""
         self.setWindowTitle(f"Midivis - {message}")
     
+    @Slot(str)
     def on_streaming_started(self, device_name: str):
         """Handle streaming started"""
+        self.stream_status_timer.start(250)
         if not self.audio_manager.is_muted:
             self.mute_button.setText("Streaming")
-            self.mute_button.setProperty("muted", False)
-            self.mute_button.style().unpolish(self.mute_button)
-            self.mute_button.style().polish(self.mute_button)
+            self.set_mute_button_muted(False)
     
+    @Slot()
     def on_streaming_stopped(self):
         """Handle streaming stopped"""
+        self.stream_status_timer.stop()
+        self.log_stream_status()
         self.mute_button.setText("Stopped")
-        self.mute_button.setProperty("muted", False)
-        self.mute_button.style().unpolish(self.mute_button)
-        self.mute_button.style().polish(self.mute_button)
+        self.set_mute_button_muted(False)
         # Clear spectrum when stopped (if analyzer is initialized)
         if self.spectrum_analyzer:
             self.spectrum_analyzer.clear_spectrum()
     
+    def log_stream_status(self):
+        """Print status flags reported by the audio callback since the last check"""
+        priority_error = self.audio_manager.take_priority_error()
+        if priority_error is not None:
+            print(f"Could not raise audio thread priority: {priority_error}")
+        for status in self.audio_manager.drain_stream_status():
+            print(f"Audio callback status: {status}")
+    
     def show_error(self, error_message: str):
         """Show error message"""
         QMessageBox.warning(self, "Audio Stream Error", error_message)
@@ -869,14 +847,7 @@ class MainWindow(QMainWindow):
         
         # Load scroll speed preference
         saved_speed = self.settings_manager.get_scroll_speed()
-        speed_text_map = {
-            50: "Slower",
-            75: "Slow", 
-            100: "Normal",
-            200: "Fast",
-            400: "Faster"
-        }
-        speed_text = speed_text_map.get(saved_speed, "Normal")
+        speed_text = SCROLL_SPEED_TEXT_BY_VALUE.get(saved_speed, "Normal")
         self.scroll_speed_input.setCurrentText(speed_text)
         
         # Apply the saved scroll speed to the piano roll widget
@@ -891,7 +862,7 @@ class MainWindow(QMainWindow):
         """Handle window close event"""
         # Save current window geometry
         self.settings_manager.set_window_geometry(self.saveGeometry())
-        self.settings_manager.save_settings()
+        self.settings_manager.save_settings()  # Flushes any pending scheduled save
         
         # Stop background worker if running
         if self.device_worker and self.device_worker.isRunning():
@@ -904,6 +875,15 @@ class MainWindow(QMainWindow):
         
         event.accept()
     
+    def changeEvent(self, event):
+        """Pause spectrum repaints while the window is minimized"""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange and self.spectrum_analyzer:
+            if self.isMinimized():
+                self.spectrum_analyzer.update_timer.stop()
+            elif self.spectrum_analyzer.isVisible():
+                self.spectrum_analyzer.update_timer.start(self.spectrum_analyzer.update_interval)
+    
     def showEvent(self, event):
         """Handle window show event - apply dark title bar on Windows"""
         super().showEvent(event)
@@ -920,67 +900,39 @@ class MainWindow(QMainWindow):
     
     def update_visualization_widget(self):
         """Update which visualization widget is shown"""
-        # layout = self.centralWidget().layout()
-        layout = self.visualizer_layout
-        
-        # Get the current visualization widget or placeholder
-        current_widget = None
-        for i in range(layout.count()):
-            item = layout.itemAt(i)
-            if item.widget() in [self.spectrum_placeholder, self.spectrum_analyzer, self.piano_roll]:
-                current_widget = item.widget()
-                break
-                
-        if not current_widget:
+        # All visualization widgets stay in the layout, switching only shows/hides them so
+        # the widgets are never reparented
+        target_widget = self.piano_roll if self.show_piano_roll else self.spectrum_analyzer
+        if not target_widget:
             return
-            
+        
+        for widget in (self.spectrum_placeholder, self.spectrum_analyzer, self.piano_roll):
+            if widget is not None and widget is not target_widget:
+                widget.hide()
+        target_widget.show()
+        target_widget.raise_()
+        
         # Handle switch to piano roll
         if self.show_piano_roll:
-            if not self.piano_roll:
-                return
-                
-            if current_widget != self.piano_roll:
-                # Replace current widget with piano roll
-                self.keyboard_visualizer.show()
-                layout.removeWidget(current_widget)
-                current_widget.hide()
-                current_widget.setParent(None)
-                
-                # Add piano roll
-                layout.addWidget(self.piano_roll, 1)
-                self.piano_roll.show()
-                self.piano_roll.raise_()
-                
-                # Update button text
-                self.view_toggle_button.setText("Spectrum")
-                
-                # Update play/pause button state based on piano roll state
-                if self.piano_roll.is_playing():
-                    self.play_pause_button.setText("Pause")
-                    self.play_pause_button.setToolTip("Pause piano roll")
-                else:
-                    self.play_pause_button.setText("Play")
-                    self.play_pause_button.setToolTip("Play piano roll")
+            self.keyboard_visualizer.show()
+            
+            # Update button text
+            self.view_toggle_button.setText("Spectrum")
+            
+            # Update play/pause button state based on piano roll state
+            if self.piano_roll.is_playing():
+                self.play_pause_button.setText("Pause")
+                self.play_pause_button.setToolTip("Pause piano roll")
+            else:
+                self.play_pause_button.setText("Play")
+                self.play_pause_button.setToolTip("Play piano roll")
         
         # Handle switch to spectrum analyzer
         else:
-            if not self.spectrum_analyzer:
-                return
-                
-            if current_widget != self.spectrum_analyzer:
-                # Replace current widget with spectrum analyzer
-                self.keyboard_visualizer.hide()
-                layout.removeWidget(current_widget)
-                current_widget.hide()
-                current_widget.setParent(None)
-                
-                # Add spectrum analyzer
-                layout.addWidget(self.spectrum_analyzer, 1)
-                self.spectrum_analyzer.show()
-                self.spectrum_analyzer.raise_()
-                
-                # Update button text
-                self.view_toggle_button.setText("Piano Roll")
+            self.keyboard_visualizer.hide()
+            
+            # Update button text
+            self.view_toggle_button.setText("Piano Roll")
     
     def toggle_visualization(self):
         """Toggle between spectrum analyzer and piano roll"""
@@ -989,11 +941,15 @@ class MainWindow(QMainWindow):
         
         # Save preference
         self.settings_manager.set_show_piano_roll(self.show_piano_roll)
-        self.settings_manager.save_settings()
     
     def resizeEvent(self, event):
         """Adjust the keyboard visualizer height to 10% of the window height."""
         super().resizeEvent(event)
-        if self.keyboard_visualizer:
-            new_height = int(self.height() * 0.1)  # 10% of the window height
+        if self.keyboard_visualizer and not self.keyboard_resize_timer.isActive():
+            self.keyboard_resize_timer.start(16)  # ~60 FPS
+    
+    def apply_keyboard_height(self):
+        """Apply the latest keyboard visualizer height, skipping no-op relayouts"""
+        new_height = int(self.height() * 0.1)  # 10% of the window height
+        if self.keyboard_visualizer.height() != new_height:
             self.keyboard_visualizer.setFixedHeight(new_height)
@@ -4,6 +4,7 @@ from PySide6.QtGui import QPainter, QBrush, QPen, QColor, QLinearGradient, QFont
 import time
 import random
 import math
+from collections import deque
 from typing import Dict, List, Tuple
 
 from src.core.settings_manager import SettingsManager
@@ -217,6 +218,10 @@ class PianoRollWidget(QWidget):
         self.active_notes: Dict[int, Tuple[float, int]] = {}  # note -> (start_time, velocity)
         self.note_history: List[Tuple[int, float, float, int, float]] = []  # (note, start_time, end_time, velocity, visual_length)
         
+        # Note events handed over by queue_note_on/off from any thread as
+        # (note, velocity or None for note off, event_time), applied each animation frame
+        self.pending_note_events = deque()
+        
         # Particle system
         self.particles: List[Particle] = []
         self.spark_particles: List[Particle] = []  # Small white spark particles
@@ -260,7 +265,7 @@ class PianoRollWidget(QWidget):
         
         # Setup timer for animation
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update)
+        self.timer.timeout.connect(self.on_animation_frame)
         self.timer.start(16)  # ~60 FPS
         
         # Track current time
@@ -384,19 +389,38 @@ class PianoRollWidget(QWidget):
         # Fallback (shouldn't reach here)
         return QColor(100, 170, 255)
     
-    def add_note_on(self, note: int, velocity: int):
-        """Handle note on event"""
+    def queue_note_on(self, note: int, velocity: int):
+        """Queue a note on event from any thread, applied on the next animation frame"""
+        self.pending_note_events.append((note, velocity, time.time()))
+    
+    def queue_note_off(self, note: int):
+        """Queue a note off event from any thread, applied on the next animation frame"""
+        self.pending_note_events.append((note, None, time.time()))
+    
+    def on_animation_frame(self):
+        """Apply queued note events, then repaint"""
+        pending = self.pending_note_events
+        while pending:
+            note, velocity, event_time = pending.popleft()
+            if velocity is None:
+                self.add_note_off(note, event_time)
+            else:
+                self.add_note_on(note, velocity, event_time)
+        self.update()
+    
+    def add_note_on(self, note: int, velocity: int, event_time: float = None):
+        """Handle note on event (event_time defaults to now)"""
         if self.LOWEST_NOTE <= note <= self.HIGHEST_NOTE:
             # Use adjusted time that accounts for pause durations
             if self.is_paused:
                 current_time = self.pause_start_time - self.total_pause_duration
             else:
-                current_time = time.time() - self.total_pause_duration
+                current_time = (event_time or time.time()) - self.total_pause_duration
             self.active_notes[note] = (current_time, velocity)
             self.update()  # Force immediate repaint
     
-    def add_note_off(self, note: int):
-        """Handle note off event"""
+    def add_note_off(self, note: int, event_time: float = None):
+        """Handle note off event (event_time defaults to now)"""
         if note in self.active_notes:
             start_time, velocity = self.active_notes[note]
             
@@ -404,7 +428,7 @@ class PianoRollWidget(QWidget):
             if self.is_paused:
                 end_time = self.pause_start_time - self.total_pause_duration
             else:
-                end_time = time.time() - self.total_pause_duration
+                end_time = (event_time or time.time()) - self.total_pause_duration
             
             # Calculate the visual length the note had when it was active
             note_duration = end_time - start_time
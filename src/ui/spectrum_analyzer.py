@@ -2,20 +2,89 @@
 Real-time audio spectrum analyzer widget
 """
 
-import numpy as np
-from PySide6.QtWidgets import QWidget, QSizePolicy
-from PySide6.QtCore import QTimer, Qt
-from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QLinearGradient
-from scipy.fft import fft
+import os
+import threading
 from collections import deque
 
+import numpy as np
+from PySide6.QtWidgets import QWidget, QSizePolicy, QApplication
+from PySide6.QtCore import QTimer, Qt, QThread, Signal, Slot, QLineF
+from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QLinearGradient, QPainterPath, QPalette, QSurfaceFormat
+from scipy.fft import rfft
+
+# Rendering through Qt's OpenGL paint engine is opt-in (MIDIVIS_GPU_SPECTRUM=1): a GL
+# surface without a working context (remote desktops, VMs, broken drivers) stays black,
+# so the raster engine is the default
+SpectrumSurface = QWidget
+GPU_RENDERING = False
+if os.environ.get('MIDIVIS_GPU_SPECTRUM') == '1':
+    try:
+        from PySide6.QtOpenGLWidgets import QOpenGLWidget as SpectrumSurface
+        GPU_RENDERING = True
+    except ImportError:
+        pass  # Build without QtOpenGLWidgets, keep the raster engine
 
-class SpectrumAnalyzer(QWidget):
+
+class SpectrumWorker(QThread):
+    """Worker thread that buffers audio blocks and runs the FFT for a SpectrumAnalyzer"""
+    
+    spectrum_ready = Signal(object)  # numpy array of per-band levels (0-1)
+    
+    def __init__(self, analyzer, parent=None):
+        super().__init__(parent)
+        self.analyzer = analyzer
+        self.pending = deque(maxlen=64)  # Oldest blocks are dropped if the worker falls behind
+        self.data_available = threading.Event()
+        self.reset_requested = False
+        self.running = True
+    
+    def push(self, audio_data):
+        """Queue an audio block for analysis"""
+        self.pending.append(audio_data)
+        self.data_available.set()
+    
+    def reset(self):
+        """Discard queued and buffered audio"""
+        self.pending.clear()
+        self.reset_requested = True
+        self.data_available.set()
+    
+    def run(self):
+        analyzer = self.analyzer
+        while self.running:
+            self.data_available.wait()
+            self.data_available.clear()
+            
+            if self.reset_requested:
+                self.reset_requested = False
+                analyzer.reset_audio_buffer()
+            
+            received = False
+            while self.pending:
+                analyzer.buffer_audio_data(self.pending.popleft())
+                received = True
+            
+            if received and analyzer.samples_received >= analyzer.fft_size:
+                self.spectrum_ready.emit(analyzer.compute_band_levels())
+    
+    def stop(self):
+        self.running = False
+        self.data_available.set()
+        self.wait()
+
+
+class SpectrumAnalyzer(SpectrumSurface):
     """Audio spectrum analyzer widget with real-time visualization"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
         
+        if GPU_RENDERING:
+            # Multisampling keeps the rounded bars antialiased on the GL paint engine
+            surface_format = QSurfaceFormat()
+            surface_format.setSamples(4)
+            self.setFormat(surface_format)
+        
         self.fullscreen = False
         
         # Spectrum parameters
@@ -23,16 +92,25 @@ class SpectrumAnalyzer(QWidget):
         self.fft_size = 4096  # Increased from 2048 for even better frequency resolution
         self.num_bars = 64
         self.frequency_range = (20, 20000)  # Hz
+        self.silence_threshold = 1e-5  # Peak amplitude below which the FFT is skipped
         
         # Visual parameters
         self.bar_width_ratio = 0.8  # Width of bars relative to available space
         self.peak_hold_time = 25  # Frames to hold peak values
         self.smoothing_factor = 0.08  # Much more responsive (reduced from 0.15)
         
-        # Data storage
-        self.audio_buffer = deque(maxlen=self.fft_size)
-        self.spectrum_data = np.zeros(self.num_bars)
-        self.peak_data = np.zeros(self.num_bars)
+        # Data storage: ring of the most recent fft_size mono samples
+        self.audio_ring = np.zeros(self.fft_size, dtype=np.float32)
+        self.ring_pos = 0  # Next write position in audio_ring
+        self.samples_received = 0  # Total samples written, capped at fft_size
+        self.fft_input = np.zeros(self.fft_size, dtype=np.float32)  # Scratch buffer for the FFT
+        self.mono_scratch = np.zeros(1024, dtype=np.float32)  # Downmix buffer, grown to the block size
+        
+        # Window function to reduce spectral leakage, with its amplitude correction
+        self.window = np.hanning(self.fft_size).astype(np.float32)
+        self.window_correction = np.sum(self.window) / self.fft_size
+        self.spectrum_data = np.zeros(self.num_bars, dtype=np.float32)
+        self.peak_data = np.zeros(self.num_bars, dtype=np.float32)
         self.peak_hold_counters = np.zeros(self.num_bars)
         
         # Calculate frequency bins
@@ -40,11 +118,21 @@ class SpectrumAnalyzer(QWidget):
         
         # Setup colors and gradients
         self.setup_colors()
+        self.update_bar_geometry()
+        
+        # FFT/DSP runs on a worker thread, only finished band levels come back
+        self.worker = SpectrumWorker(self)
+        self.worker.spectrum_ready.connect(self.apply_band_levels)
+        self.worker.start()
+        QApplication.instance().aboutToQuit.connect(self.worker.stop)
         
-        # UI update timer
+        # UI update timer, only runs while the widget is shown and only repaints
+        # when new spectrum data arrived since the last frame
+        self.update_interval = 16  # ~60 FPS, matches typical display refresh
+        self.dirty = False
         self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update)
-        self.update_timer.start(12)  # ~83 FPS for very smooth animation
+        self.update_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.update_timer.timeout.connect(self.repaint_if_dirty)
         
         # Widget properties - allow it to grow to fill available space
         self.setMinimumHeight(120)
@@ -63,24 +151,40 @@ class SpectrumAnalyzer(QWidget):
         fft_freqs = np.fft.fftfreq(self.fft_size, 1.0 / self.sample_rate)[:self.fft_size // 2]
         max_freq = fft_freqs[-1]  # Nyquist frequency
         
-        self.bin_indices = []
-        for i in range(self.num_bars):
-            # Find FFT bins that fall within this frequency band
-            low_freq = log_frequencies[i]
-            high_freq = min(log_frequencies[i + 1], max_freq)  # Don't exceed Nyquist
-            
-            low_bin = np.searchsorted(fft_freqs, low_freq)
-            high_bin = np.searchsorted(fft_freqs, high_freq)
-            
-            # Ensure we have at least one bin
-            if high_bin <= low_bin:
-                high_bin = low_bin + 1
-            
-            # For the highest frequencies, ensure we capture up to Nyquist
-            if i == self.num_bars - 1:
-                high_bin = len(fft_freqs)
-                
-            self.bin_indices.append((low_bin, high_bin))
+        # Find the FFT bins that fall within each frequency band as [low, high) index
+        # arrays, without exceeding Nyquist
+        num_bins = len(fft_freqs)
+        band_low = np.searchsorted(fft_freqs, log_frequencies[:-1]).astype(np.int32)
+        band_high = np.searchsorted(fft_freqs, np.minimum(log_frequencies[1:], max_freq)).astype(np.int32)
+        
+        # Ensure we have at least one bin per band
+        band_high = np.maximum(band_high, band_low + 1)
+        
+        # For the highest frequencies, ensure we capture up to Nyquist
+        band_high[-1] = num_bins
+        
+        # Mask for bands whose range lies inside the spectrum
+        self.band_valid = band_high <= num_bins
+        self.band_low = np.minimum(band_low, num_bins)
+        self.band_high = np.minimum(band_high, num_bins)
+        self.band_counts = np.maximum(self.band_high - self.band_low, 1)
+        
+        # Slight high-frequency boost (in dB) for better visibility, fixed per band
+        freq_centers = np.sqrt(self.band_low * self.band_high) * self.sample_rate / self.fft_size
+        with np.errstate(divide='ignore'):
+            boost = np.log10(freq_centers / 2000) * 3.0
+        self.hf_compensation_db = np.where(freq_centers > 2000, np.minimum(6.0, boost), 0.0)
+        
+        # Per-band mean power scale, including proper FFT scaling for spectrum analysis
+        # (FFT size and window correction factor), applied to 64 bands instead of every bin
+        magnitude_scale = 1.0 / (self.fft_size * self.window_correction)
+        self.band_power_scale = magnitude_scale ** 2 / self.band_counts
+        
+        # Scratch buffers for the per-frame power spectrum and its running sum. The running
+        # sum stays float64: band powers are differences of it and narrow low bands would
+        # lose all precision in float32.
+        self.power_scratch = np.zeros(self.fft_size // 2, dtype=np.float32)
+        self.cumulative_power = np.zeros(self.fft_size // 2 + 1)
     
     def setup_colors(self):
         """Setup color gradients for the spectrum"""
@@ -93,91 +197,162 @@ class SpectrumAnalyzer(QWidget):
         
         # Peak line color
         self.peak_color = QColor(255, 255, 255, 200)
+        self.peak_pen = QPen(self.peak_color, 1)
         
         # Background color
         self.bg_color = QColor(25, 25, 25)
+        self.bg_brush = QBrush(self.bg_color)
+        self.border_pen = QPen(QColor(51, 51, 51), 1)
+        
+        # Bar gradient brush, depends on the widget height
+        self.update_bar_brush()
     
-    def add_audio_data(self, audio_data):
-        """Add new audio data for spectrum analysis"""
-        if len(audio_data.shape) > 1:
-            # Convert stereo to mono by averaging channels
-            audio_data = np.mean(audio_data, axis=1)
+    def update_bar_brush(self):
+        """Rebuild the vertical bar gradient for the current widget height"""
+        margin = 4
+        height = self.height() - (margin * 2)
+        gradient = QLinearGradient(0, height + margin, 0, margin)
+        gradient.setColorAt(0.0, QColor(50, 100, 255))   # Blue (bottom)
+        gradient.setColorAt(0.6, QColor(50, 255, 50))    # Green
+        gradient.setColorAt(0.8, QColor(255, 255, 50))   # Yellow
+        gradient.setColorAt(1.0, QColor(255, 50, 50))    # Red (top)
+        self.bar_brush = QBrush(gradient)
+    
+    def update_bar_geometry(self):
+        """Precompute bar positions and sizes for the current widget size"""
+        # Calculate bar dimensions with minimal margin for rounded frame
+        margin = 4  # Reduced margin to match input controls
+        width = self.width() - (margin * 2)
+        height = self.height() - (margin * 2)
+        bar_spacing = width / max(self.num_bars, 1)
         
-        # Add to buffer
-        self.audio_buffer.extend(audio_data.flatten())
+        self.bar_width = bar_spacing * self.bar_width_ratio
+        self.bar_area_height = height
+        self.bar_bottom = margin + height
+        self.bar_x = [margin + i * bar_spacing + (bar_spacing - self.bar_width) / 2 for i in range(self.num_bars)]
+    
+    def resizeEvent(self, event):
+        """Update size-dependent paint resources"""
+        super().resizeEvent(event)
+        self.update_bar_brush()
+        self.update_bar_geometry()
+    
+    def add_audio_data(self, audio_data):
+        """Add new audio data for spectrum analysis (processed on the worker thread)"""
+        # Only analyze audio while the result can actually be seen
+        if self.update_timer.isActive():
+            self.worker.push(audio_data)
+    
+    def buffer_audio_data(self, audio_data):
+        """Append an audio block to the sample ring (worker thread)"""
+        if audio_data.dtype.kind == 'i':
+            # Integer streams (e.g. int16) are scaled to the -1..1 full-scale range
+            scale = np.float32(1.0 / (np.iinfo(audio_data.dtype).max + 1))
+            audio_data = audio_data.astype(np.float32) * scale
+        elif audio_data.dtype != np.float32:
+            audio_data = audio_data.astype(np.float32)
+
+        if audio_data.ndim > 1:
+            frames, channels = audio_data.shape
+            if channels == 1:
+                audio_data = audio_data[:, 0]  # Mono input is just a view, no copy
+            else:
+                # Convert stereo to mono by averaging channels into the reused scratch buffer
+                if frames > len(self.mono_scratch):
+                    self.mono_scratch = np.zeros(frames, dtype=np.float32)
+                mono = self.mono_scratch[:frames]
+                if channels == 2:
+                    np.add(audio_data[:, 0], audio_data[:, 1], out=mono)
+                else:
+                    np.sum(audio_data, axis=1, out=mono)
+                mono *= np.float32(1.0 / channels)
+                audio_data = mono
         
-        # Process if we have enough data
-        if len(self.audio_buffer) >= self.fft_size:
-            self.process_spectrum()
+        # Add to ring buffer, only the newest fft_size samples matter
+        samples = audio_data.reshape(-1)[-self.fft_size:]
+        count = len(samples)
+        end = self.ring_pos + count
+        if end <= self.fft_size:
+            self.audio_ring[self.ring_pos:end] = samples
+        else:
+            split = self.fft_size - self.ring_pos
+            self.audio_ring[self.ring_pos:] = samples[:split]
+            self.audio_ring[:end - self.fft_size] = samples[split:]
+        self.ring_pos = end % self.fft_size
+        self.samples_received = min(self.samples_received + count, self.fft_size)
     
-    def process_spectrum(self):
-        """Process audio buffer to generate spectrum data"""
-        if len(self.audio_buffer) < self.fft_size:
-            return
+    def reset_audio_buffer(self):
+        """Clear the sample ring (worker thread)"""
+        self.audio_ring.fill(0)
+        self.ring_pos = 0
+        self.samples_received = 0
+    
+    def compute_band_levels(self):
+        """Run the FFT over the sample ring and return per-band levels in the 0-1 range"""
+        # A silent window (below -100 dBFS) always maps to empty bars, so skip the FFT for it
+        ring_peak = max(self.audio_ring.max(), -self.audio_ring.min())
+        if ring_peak < self.silence_threshold:
+            return np.zeros(self.num_bars, dtype=np.float32)
+        
+        # Unroll the ring (oldest sample first) into the scratch buffer and apply the window
+        tail = self.fft_size - self.ring_pos
+        self.fft_input[:tail] = self.audio_ring[self.ring_pos:]
+        self.fft_input[tail:] = self.audio_ring[:self.ring_pos]
+        np.multiply(self.fft_input, self.window, out=self.fft_input)
+        
+        # Compute real-input FFT (only the non-negative frequencies)
+        fft_data = rfft(self.fft_input, overwrite_x=True, workers=-1)
         
-        # Get latest audio data
-        audio_chunk = np.array(list(self.audio_buffer)[-self.fft_size:])
-        
-        # Apply window function to reduce spectral leakage
-        window = np.hanning(self.fft_size)
-        windowed_data = audio_chunk * window
-        
-        # Compute FFT
-        fft_data = fft(windowed_data)
-        magnitude = np.abs(fft_data[:self.fft_size // 2])
-        
-        # Proper FFT scaling for spectrum analysis
-        # Scale by FFT size and window correction factor
-        window_correction = np.sum(window) / self.fft_size
-        magnitude = magnitude / (self.fft_size * window_correction)
-        
-        # Convert to dBFS (decibels relative to full scale)
-        # Add small epsilon to avoid log(0)
-        magnitude_db = 20 * np.log10(magnitude + 1e-12)
-        
-        # Group into frequency bands using energy-weighted approach
-        new_spectrum = np.zeros(self.num_bars)
-        for i, (low_bin, high_bin) in enumerate(self.bin_indices):
-            if high_bin <= len(magnitude_db):
-                band_data = magnitude_db[low_bin:high_bin]
-                
-                # Convert dB back to linear scale for proper energy weighting
-                linear_magnitudes = 10 ** (band_data / 20)
-                
-                # Use RMS (Root Mean Square) which better represents energy
-                # This gives more weight to stronger frequencies in the band
-                rms_magnitude = np.sqrt(np.mean(linear_magnitudes ** 2))
-                
-                # Convert back to dB
-                band_magnitude = 20 * np.log10(rms_magnitude + 1e-12)
-                
-                # Apply slight high-frequency compensation for better visibility
-                freq_center = np.sqrt(self.get_frequency_for_bin(low_bin) * self.get_frequency_for_bin(high_bin))
-                if freq_center > 2000:  # Subtle boost for high frequencies only
-                    compensation = min(6.0, np.log10(freq_center / 2000) * 3.0)
-                    band_magnitude += compensation
-                
-                # Normalize to 0-1 range using -80dB to -20dB range for better use of visual space
-                normalized = (band_magnitude + 80) / 60
-                new_spectrum[i] = max(0, min(1, normalized))
+        # Group into frequency bands using energy-weighted approach: the RMS of the linear
+        # magnitudes in each band, computed for all bands at once from a cumulative power sum.
+        # Power and its running sum are written into preallocated buffers.
+        power = self.power_scratch
+        np.abs(fft_data[:self.fft_size // 2], out=power)
+        np.square(power, out=power)
+        np.cumsum(power, out=self.cumulative_power[1:])
+        band_power = (self.cumulative_power[self.band_high] - self.cumulative_power[self.band_low]) * self.band_power_scale
         
+        # Convert to dBFS (decibels relative to full scale), add small epsilon to avoid log(0)
+        band_magnitude = 10 * np.log10(band_power + 1e-24) + self.hf_compensation_db
+        
+        # Normalize to 0-1 range using -80dB to -20dB range for better use of visual space
+        new_spectrum = np.clip((band_magnitude + 80) / 60, 0, 1).astype(np.float32)
+        new_spectrum[~self.band_valid] = 0
+        return new_spectrum
+    
+    @Slot(object)
+    def apply_band_levels(self, new_spectrum):
+        """Fold new band levels into the displayed spectrum and peak hold"""
         # Less smoothing for more responsive display
         self.spectrum_data = (self.smoothing_factor * new_spectrum + 
                              (1 - self.smoothing_factor) * self.spectrum_data)
         
-        # Update peak hold
-        for i in range(self.num_bars):
-            if self.spectrum_data[i] > self.peak_data[i]:
-                self.peak_data[i] = self.spectrum_data[i]
-                self.peak_hold_counters[i] = self.peak_hold_time
-            elif self.peak_hold_counters[i] > 0:
-                self.peak_hold_counters[i] -= 1
-            else:
-                self.peak_data[i] *= 0.92  # Faster decay for more responsive peaks
+        # Update peak hold: rising bars grab the peak, held peaks count down, the rest decay
+        rising = self.spectrum_data > self.peak_data
+        holding = ~rising & (self.peak_hold_counters > 0)
+        decaying = ~rising & ~holding
+        
+        self.peak_data[rising] = self.spectrum_data[rising]
+        self.peak_hold_counters[rising] = self.peak_hold_time
+        self.peak_hold_counters[holding] -= 1
+        self.peak_data[decaying] *= 0.92  # Faster decay for more responsive peaks
+        self.dirty = True
     
-    def get_frequency_for_bin(self, bin_index):
-        """Get the frequency for a given FFT bin index"""
-        return bin_index * self.sample_rate / self.fft_size
+    def repaint_if_dirty(self):
+        """Schedule a repaint if the spectrum changed since the last frame"""
+        if self.dirty:
+            self.dirty = False
+            self.update()
+    
+    def showEvent(self, event):
+        """Resume repainting when the widget becomes visible"""
+        super().showEvent(event)
+        self.update_timer.start(self.update_interval)
+    
+    def hideEvent(self, event):
+        """Stop repainting while the widget is hidden"""
+        super().hideEvent(event)
+        self.update_timer.stop()
     
     def paintEvent(self, event):
         """Paint the spectrum analyzer"""
@@ -188,54 +363,50 @@ class SpectrumAnalyzer(QWidget):
         border_radius = 0 if self.fullscreen else 8
 
         frame_rect = self.rect().adjusted(0, 0, 0, 0)  # No extra margin - use layout margin only
-        painter.setPen(QPen(QColor(51, 51, 51), 1))  # Border color
-        painter.setBrush(QBrush(self.bg_color))
+        if GPU_RENDERING:
+            # GL surfaces are opaque, so paint the corners outside the rounded frame ourselves
+            painter.fillRect(frame_rect, self.palette().color(QPalette.ColorRole.Window))
+        painter.setPen(self.border_pen)  # Border color
+        painter.setBrush(self.bg_brush)
         painter.drawRoundedRect(frame_rect, border_radius, border_radius)  # Rounded corners
         
         if self.num_bars == 0:
             return
         
-        # Calculate bar dimensions with minimal margin for rounded frame
-        margin = 4  # Reduced margin to match input controls
-        width = self.width() - (margin * 2)
-        height = self.height() - (margin * 2)
-        bar_width = (width / self.num_bars) * self.bar_width_ratio
-        bar_spacing = width / self.num_bars
-        
-        # Set up gradient for bars
-        gradient = QLinearGradient(0, height + margin, 0, margin)
-        gradient.setColorAt(0.0, QColor(50, 100, 255))   # Blue (bottom)
-        gradient.setColorAt(0.6, QColor(50, 255, 50))    # Green
-        gradient.setColorAt(0.8, QColor(255, 255, 50))   # Yellow
-        gradient.setColorAt(1.0, QColor(255, 50, 50))    # Red (top)
-        
-        brush = QBrush(gradient)
-        painter.setBrush(brush)
+        # Gradient for bars (cached, rebuilt on resize)
+        painter.setBrush(self.bar_brush)
         painter.setPen(Qt.PenStyle.NoPen)
         
         # Set clipping region to rounded rect to ensure bars don't extend outside
         painter.setClipRect(frame_rect)
         
+        # Collect all bars into one path and all peak lines into one list,
+        # so each layer is a single paint call
+        bar_width = self.bar_width
+        bar_heights = (self.spectrum_data * self.bar_area_height).tolist()
+        bar_tops = (self.bar_bottom - self.spectrum_data * self.bar_area_height).tolist()
+        peak_ys = (self.bar_bottom - self.peak_data * self.bar_area_height).tolist()
+        peak_visible = (self.peak_data > 0.01).tolist()  # Only draw if peak is significant
+        
+        bars_path = QPainterPath()
+        peak_lines = []
+        for x, y, bar_height, peak_y, show_peak in zip(self.bar_x, bar_tops, bar_heights, peak_ys, peak_visible):
+            bars_path.addRoundedRect(x, y, bar_width, bar_height, 2, 2)
+            if show_peak:
+                peak_lines.append(QLineF(x, peak_y, x + bar_width, peak_y))
+        
         # Draw spectrum bars
-        for i in range(self.num_bars):
-            x = margin + i * bar_spacing + (bar_spacing - bar_width) / 2
-            bar_height = self.spectrum_data[i] * height
-            y = margin + height - bar_height
-            
-            # Draw main bar
-            painter.drawRoundedRect(x, y, bar_width, bar_height, 2, 2)
-            
-            # Draw peak line
-            if self.peak_data[i] > 0.01:  # Only draw if peak is significant
-                peak_y = margin + height - (self.peak_data[i] * height)
-                painter.setPen(QPen(self.peak_color, 1))
-                painter.drawLine(x, peak_y, x + bar_width, peak_y)
-                painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawPath(bars_path)
+        
+        # Draw peak lines
+        if peak_lines:
+            painter.setPen(self.peak_pen)
+            painter.drawLines(peak_lines)
     
     def clear_spectrum(self):
         """Clear the spectrum data"""
         self.spectrum_data.fill(0)
         self.peak_data.fill(0)
         self.peak_hold_counters.fill(0)
-        self.audio_buffer.clear()
+        self.worker.reset()
         self.update()